@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +11,17 @@ class Settings(BaseSettings):
     mongodb_uri: str = Field('mongodb://localhost:27017/licenguard', env='MONGODB_URI')
     database_name: str = Field('licenguard', env='MONGODB_DB')
     mcp_http_url: str | None = Field(None, env='MCP_HTTP_URL')
+    # Wire-protocol compression, negotiated with the server in order of preference
+    mongodb_compressors: str = Field('zstd,zlib', env='MONGODB_COMPRESSORS')
+    mongodb_zlib_level: int = Field(6, env='MONGODB_ZLIB_LEVEL')
+    # Connection pool, sized for one worker's concurrent requests
+    mongodb_max_pool_size: int = Field(50, env='MONGODB_MAX_POOL_SIZE')
+    mongodb_min_pool_size: int = Field(5, env='MONGODB_MIN_POOL_SIZE')
+    mongodb_max_idle_ms: int = Field(60000, env='MONGODB_MAX_IDLE_MS')
+    mongodb_wait_queue_timeout_ms: int = Field(2000, env='MONGODB_WAIT_QUEUE_TIMEOUT_MS')
+    mongodb_server_selection_timeout_ms: int = Field(5000, env='MONGODB_SERVER_SELECTION_TIMEOUT_MS')
+    # Highest-risk scan responses are reused per (repository, commit) for this long; 0 disables
+    scan_result_ttl_seconds: int = Field(3600, env='SCAN_RESULT_TTL_SECONDS')
 
     model_config = SettingsConfigDict(
         env_file=str(ENV_PATH),
@@ -20,4 +32,7 @@ class Settings(BaseSettings):
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    # Also export .env to os.environ for services reading tokens via os.getenv;
+    # cached, so this runs once per process whichever module imports first
+    load_dotenv(ENV_PATH)
     return Settings()
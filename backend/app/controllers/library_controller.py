@@ -1,10 +1,14 @@
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+import logging
 import re
-from typing import List
+from typing import Dict, Iterable, List, Tuple
 from bson import ObjectId
 from fastapi import HTTPException
-from ..database import get_database
+from ..database import fetch_validated, get_collection
 from ..models.library import (
+    LIBRARY_LIST_ADAPTER,
     LibraryCreate,
     LibraryDocument,
     LibraryDiscoveryReport,
@@ -13,32 +17,102 @@ from ..models.library import (
     VersionModel
 )
 from ..services.mcp_client import MCPClientError, get_mcp_http_client
-from pymongo import ReturnDocument
+from pymongo import ASCENDING, DESCENDING, TEXT, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
 
 
-collection = get_database()['libraries']
+logger = logging.getLogger(__name__)
+collection = get_collection('libraries')
 
+# Documents per getMore round trip
+_BATCH_SIZE = 500
 
-async def list_libraries(limit: int | None = None) -> List[LibraryDocument]:
-    cursor = collection.find().sort('updated_at', -1)
+# Serialized search responses per (endpoint, q), filled by the search views.
+# Every write below clears it, whichever route or scan made the write; other
+# worker processes keep their own copy, which only the view's TTL expires.
+search_cache: 'OrderedDict[Tuple[str, str], Tuple[float, bytes, str]]' = OrderedDict()
+# Listing fields for summary views: version strings only, no license/risk details
+_SUMMARY_PROJECTION = {
+    'name': 1,
+    'ecosystem': 1,
+    'description': 1,
+    'repository_url': 1,
+    'officialSite': 1,
+    'created_at': 1,
+    'updated_at': 1,
+    'versions.version': 1,
+}
+
+_PARSE_PATTERNS = tuple(re.compile(p) for p in (
+    r'"?([\w.\-@/]+)"?\s*:\s*"?(?:\^)?([\w.\-]+)"?',  # "name": "^1.2.3"
+    r'([\w.\-@/]+)==([\w.\-]+)',                     # name==1.2.3 (Python)
+    r'([\w.\-@/]+)=([\w.\-]+)',                      # name=1.2.3
+    r'([\w.\-@/]+)@([\w.\-]+)',                      # name@1.2.3
+    r'([\w.\-@/]+)\s+([\w.\-]+)',                    # name 1.2.3 (space-separated)
+    r'([\w.\-@/]+)\s*,\s*\^?([\w.\-]+)',             # name , ^1.2.3
+    r'([\w.\-@/]+)\s+\^([\w.\-]+)',                  # name ^1.2.3
+))
+
+# Package names without regex metacharacters can be matched by plain equality
+_PLAIN_NAME_RE = re.compile(r'[\w.\-@/]+')
+
+
+@lru_cache(maxsize=1024)
+def _escape(term: str) -> str:
+    return re.escape(term)
+
+
+@lru_cache(maxsize=2048)
+def _v_norm(version: str | None) -> str:
+    return (version or '').lstrip('v').lower()
+
+
+def _dump_json(docs: List[LibraryDocument]) -> str:
+    """Serialize documents for debug logs in one pydantic-core call."""
+    return LIBRARY_LIST_ADAPTER.dump_json(docs).decode()
+
+
+def _filter_by_version(docs: List[LibraryDocument], ver_norm: str) -> List[LibraryDocument]:
+    return [doc for doc in docs if any(_v_norm(v.version) == ver_norm for v in doc.versions or [])]
+
+
+async def ensure_indexes() -> None:
+    """Create the indexes backing library search and the name+ecosystem upsert.
+
+    Failures are logged rather than raised so a pre-existing conflicting index
+    (or duplicate legacy data blocking the unique index) does not stop the API.
+    """
+    indexes = [
+        ([('name', TEXT), ('versions.version', TEXT)], {'name': 'libraries_text'}),
+        ([('updated_at', DESCENDING)], {}),
+        ([('name', ASCENDING), ('ecosystem', ASCENDING)], {'unique': True}),
+        ([('name_lower', ASCENDING)], {}),
+    ]
+    for keys, options in indexes:
+        try:
+            await collection.create_index(keys, **options)
+        except PyMongoError as exc:
+            logger.warning('[libraries] could not create index %s: %s', keys, exc)
+    # Backfill the normalized name for documents written before it existed
+    try:
+        await collection.update_many(
+            {'name_lower': {'$exists': False}},
+            [{'$set': {'name_lower': {'$toLower': '$name'}}}]
+        )
+    except PyMongoError as exc:
+        logger.warning('[libraries] could not backfill name_lower: %s', exc)
+
+
+async def list_libraries(limit: int | None = None, summary: bool = False) -> List[LibraryDocument]:
+    cursor = collection.find(projection=_SUMMARY_PROJECTION if summary else None).sort('updated_at', -1).batch_size(_BATCH_SIZE)
     if limit and limit > 0:
         cursor = cursor.limit(limit)
-    docs = [LibraryDocument(**doc) async for doc in cursor]
-    return docs
+    return await fetch_validated(cursor, LIBRARY_LIST_ADAPTER, _BATCH_SIZE)
 
 def _parse_package_query(value: str) -> tuple[str | None, str | None]:
     text = value.strip().strip('"')
-    patterns = [
-        r'"?([\w.\-@/]+)"?\s*:\s*"?(?:\^)?([\w.\-]+)"?',  # "name": "^1.2.3"
-        r'([\w.\-@/]+)==([\w.\-]+)',                     # name==1.2.3 (Python)
-        r'([\w.\-@/]+)=([\w.\-]+)',                      # name=1.2.3
-        r'([\w.\-@/]+)@([\w.\-]+)',                      # name@1.2.3
-        r'([\w.\-@/]+)\s+([\w.\-]+)',                    # name 1.2.3 (space-separated)
-        r'([\w.\-@/]+)\s*,\s*\^?([\w.\-]+)',             # name , ^1.2.3
-        r'([\w.\-@/]+)\s+\^([\w.\-]+)',                  # name ^1.2.3
-    ]
-    for pattern in patterns:
-        m = re.search(pattern, text)
+    for pattern in _PARSE_PATTERNS:
+        m = pattern.search(text)
         if m:
             return m.group(1), m.group(2).lstrip('^')
     parts = text.split(':')
@@ -49,104 +123,158 @@ def _parse_package_query(value: str) -> tuple[str | None, str | None]:
     return None, None
 
 
-def _build_terms(query: str, name_token: str | None, version_token: str | None) -> set[str]:
+def _build_terms(query: str, name_token: str | None, version_token: str | None) -> List[str]:
+    # Ordered dedupe keeps the generated query shape stable across identical searches
     cleaned = query.strip('"').strip()
-    terms = {query, cleaned}
+    terms = dict.fromkeys([query, cleaned])
     if name_token:
-        terms.add(name_token)
+        terms[name_token] = None
     if version_token:
-        terms.add(version_token)
+        terms[version_token] = None
     if query.startswith('^'):
-        terms.add(query.lstrip('^'))
-    if '@' in query:
-        terms.add(query)
-    return terms
+        terms[query.lstrip('^')] = None
+    return list(terms)
+
+
+def _terms_regex(terms: List[str]) -> str:
+    """Build one alternation regex for the OR-ed search terms.
+
+    Terms containing another (case-insensitively) are dropped, since the shorter
+    term already matches everything the longer one would.
+    """
+    lowered = {t.lower(): t for t in terms if t}
+    kept = [t for low, t in lowered.items() if not any(o != low and o in low for o in lowered)]
+    return '|'.join(_escape(t) for t in kept)
 
 
 async def _search_mongo(query: str, name_token: str | None, version_token: str | None) -> List[LibraryDocument]:
-    docs: List[LibraryDocument] = []
-    seen_ids = set()
-
-    # If version is present, try an exact name+version match first and keep them
-    if name_token and version_token:
-        version_norm = version_token.lstrip('v')
-        version_regex = f'^v?{re.escape(version_norm)}$'
-        exact_cursor = collection.find({
-            'name': {'$regex': f'^{re.escape(name_token)}$', '$options': 'i'},
-            'versions.version': {'$regex': version_regex, '$options': 'i'}
-        }).sort('updated_at', -1)
-        exact_docs = [LibraryDocument(**doc) async for doc in exact_cursor]
-        for d in exact_docs:
-            if d.id not in seen_ids:
-                seen_ids.add(d.id)
-                docs.append(d)
-
-    terms = _build_terms(query, name_token, version_token)
-    regexes = [{'name': {'$regex': re.escape(term), '$options': 'i'}} for term in terms]
-    regexes += [{'versions.version': {'$regex': re.escape(term), '$options': 'i'}} for term in terms]
-    cursor = collection.find({'$or': regexes}).sort('updated_at', -1)
-    broad_docs = [LibraryDocument(**doc) async for doc in cursor]
-    for d in broad_docs:
-        if d.id not in seen_ids:
-            seen_ids.add(d.id)
-            docs.append(d)
-    return docs
+    if not (query and query.strip()):
+        return []
+    # A requested version must be present on the library; let Mongo drop the rest
+    version_clause = None
+    if version_token:
+        version_clause = {'versions.version': {'$regex': f'^v*{_escape(_v_norm(version_token))}$', '$options': 'i'}}
+
+    # If version is present (or the query is a bare package name), an exact
+    # name match is folded into the same query as an indexed equality on
+    # name_lower and ranked ahead of the broad matches
+    exact_name = name_token if name_token and version_clause else None
+    if exact_name is None and not name_token:
+        bare = query.strip().strip('"').strip()
+        if _PLAIN_NAME_RE.fullmatch(bare):
+            exact_name = bare
+    exact_clause = None
+    priority = None
+    if exact_name:
+        name_lower = exact_name.lower()
+        exact_clause = {'name_lower': name_lower}
+        priority = {'$cond': [{'$eq': ['$name_lower', name_lower]}, 0, 1]}
+
+    def _pipeline(broad: dict, text_score: bool) -> List[dict]:
+        match = {'$or': [exact_clause, broad]} if exact_clause else broad
+        if version_clause:
+            match = {'$and': [match, version_clause]}
+        sort: dict = {'_priority': 1} if priority else {}
+        if text_score:
+            sort['score'] = {'$meta': 'textScore'}
+        sort['updated_at'] = -1
+        stages: List[dict] = [{'$match': match}]
+        if priority:
+            stages.append({'$addFields': {'_priority': priority}})
+        stages.append({'$sort': sort})
+        if priority:
+            stages.append({'$project': {'_priority': 0}})
+        return stages
+
+    # Broad match: use the text index first and only fall back to the regex
+    # scan when it finds nothing (or the text index is unavailable)
+    try:
+        text_cursor = await collection.aggregate(_pipeline({'$text': {'$search': query}}, text_score=True), batchSize=_BATCH_SIZE)
+        docs = await fetch_validated(text_cursor, LIBRARY_LIST_ADAPTER, _BATCH_SIZE)
+    except OperationFailure as exc:
+        logger.warning('[search_mongo] text search failed, falling back to regex: %s', exc)
+        docs = []
+    if docs:
+        return docs
+
+    alternation = _terms_regex(_build_terms(query, name_token, version_token))
+    regexes = [
+        {'name': {'$regex': alternation, '$options': 'i'}},
+        {'versions.version': {'$regex': alternation, '$options': 'i'}},
+    ]
+    cursor = await collection.aggregate(_pipeline({'$or': regexes}, text_score=False), batchSize=_BATCH_SIZE)
+    return await fetch_validated(cursor, LIBRARY_LIST_ADAPTER, _BATCH_SIZE)
 
 
 async def search_libraries_local(query: str) -> LibrarySearchResponse:
+    if not (query and query.strip()):
+        return LibrarySearchResponse(source='mongo', results=[])
     name_token, version_token = _parse_package_query(query)
     docs = await _search_mongo(query, name_token, version_token)
-    ts = datetime.utcnow().isoformat()
-    print(f'{ts} [search_libraries_local] request', {'q': query, 'name_token': name_token, 'version_token': version_token})
-    if version_token:
-        ver_norm = version_token.lstrip('v').lower()
-        filtered = [
-            doc for doc in docs
-            if any((v.version or '').lstrip('v').lower() == ver_norm for v in doc.versions or [])
-        ]
-        if filtered:
-            docs = filtered
-        else:
-            docs = []
-    print(f'{ts} [search_libraries_local] response', {'count': len(docs), 'results': [doc.model_dump() for doc in docs]})
+    logger.debug('[search_libraries_local] request q=%r name_token=%r version_token=%r', query, name_token, version_token)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('[search_libraries_local] response count=%d results=%s', len(docs), _dump_json(docs))
     return LibrarySearchResponse(source='mongo', results=docs)
 
 
+async def search_libraries_bulk(names: List[str], versions: Iterable[str] | None = None) -> Dict[str, LibraryDocument]:
+    """Exact-name lookup for many packages in one indexed `$in` query.
+
+    Returns the most recently updated document per lowercased name; names
+    without a stored library are simply absent from the result. When
+    `versions` (normalized version strings) is given, each document's
+    `versions` is trimmed server-side to its first entry plus the entries
+    matching one of them, so unused version history never leaves Mongo.
+    """
+    keys = list(dict.fromkeys(name.lower() for name in names if name))
+    if not keys:
+        return {}
+    pipeline: List[dict] = [{'$match': {'name_lower': {'$in': keys}}}, {'$sort': {'updated_at': -1}}]
+    if versions is not None:
+        wanted = list(dict.fromkeys(v.lower() for v in versions if v))
+        stored = {'$ifNull': ['$versions', []]}
+        # Same steps as normalize_version: lstrip('^'), lstrip('v'), strip()
+        normalized = {'$toLower': {'$trim': {'input': {'$ltrim': {
+            'input': {'$ltrim': {'input': '$$v.version', 'chars': '^'}}, 'chars': 'v'
+        }}}}}
+        # The first entry is always kept, so only filter the rest ($slice needs n > 0)
+        rest = {'$slice': [stored, 1, {'$max': [{'$size': stored}, 1]}]}
+        pipeline.append({'$set': {'versions': {'$concatArrays': [
+            {'$slice': [stored, 1]},
+            {'$filter': {'input': rest, 'as': 'v', 'cond': {'$in': [normalized, wanted]}}},
+        ]}}})
+    cursor = await collection.aggregate(pipeline, batchSize=_BATCH_SIZE)
+    found: Dict[str, LibraryDocument] = {}
+    for doc in await fetch_validated(cursor, LIBRARY_LIST_ADAPTER, _BATCH_SIZE):
+        found.setdefault(doc.name.lower(), doc)
+    logger.debug('[search_libraries_bulk] request count=%d found=%d', len(keys), len(found))
+    return found
+
+
 async def search_libraries(query: str) -> LibrarySearchResponse:
+    if not (query and query.strip()):
+        return LibrarySearchResponse(source='mongo', results=[])
     name_token, version_token = _parse_package_query(query)
-    ts_req = datetime.utcnow().isoformat()
-    print(f'{ts_req} [search_libraries] request', {'q': query, 'name_token': name_token, 'version_token': version_token})
+    logger.debug('[search_libraries] request q=%r name_token=%r version_token=%r', query, name_token, version_token)
     docs = await _search_mongo(query, name_token, version_token)
-    fallback_to_mcp = False
-    if version_token:
-        ver_norm = version_token.lstrip('v').lower()
-        filtered = [
-            doc for doc in docs
-            if any((v.version or '').lstrip('v').lower() == ver_norm for v in doc.versions or [])
-        ]
-        if filtered:
-            docs = filtered
-        else:
-            docs = []
-            fallback_to_mcp = True
     if docs:
-        ts_res = datetime.utcnow().isoformat()
-        print(f'{ts_res} [search_libraries] mongo response', {'count': len(docs), 'results': [doc.model_dump() for doc in docs]})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('[search_libraries] mongo response count=%d results=%s', len(docs), _dump_json(docs))
         return LibrarySearchResponse(source='mongo', results=docs)
 
     client = get_mcp_http_client()
     if not client:
-        print(f'{datetime.utcnow().isoformat()} [search_libraries] MCP client not configured')
+        logger.info('[search_libraries] MCP client not configured')
         return LibrarySearchResponse(source='mcp', results=[])
 
     try:
         report_name = f'{name_token}@{version_token}' if name_token and version_token else (name_token or query)
         report = await client.discover_library({'name': report_name})
     except MCPClientError as error:
-        print(f'{datetime.utcnow().isoformat()} [search_libraries] MCP lookup failed for "{query}": {error}')
+        logger.warning('[search_libraries] MCP lookup failed for %r: %s', query, error)
         return LibrarySearchResponse(source='mcp', results=[])
     except Exception as exc:
-        print(f'{datetime.utcnow().isoformat()} [search_libraries] unexpected error for "{query}": {exc}')
+        logger.warning('[search_libraries] unexpected error for %r: %s', query, exc)
         return LibrarySearchResponse(source='mcp', results=[])
 
     if not report:
@@ -164,12 +292,9 @@ async def search_libraries(query: str) -> LibrarySearchResponse:
             except Exception:
                 continue
         if version_token:
-            ver_norm = version_token.lstrip('v').lower()
-            mongo_docs = [
-                doc for doc in mongo_docs
-                if any((v.version or '').lstrip('v').lower() == ver_norm for v in doc.versions or [])
-            ]
-        print(f'{datetime.utcnow().isoformat()} [search_libraries] mcp→mongo passthrough', {'count': len(mongo_docs), 'results': [doc.model_dump() for doc in mongo_docs]})
+            mongo_docs = _filter_by_version(mongo_docs, _v_norm(version_token))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('[search_libraries] mcp→mongo passthrough count=%d results=%s', len(mongo_docs), _dump_json(mongo_docs))
         if mongo_docs:
             return LibrarySearchResponse(source='mongo', results=mongo_docs, discovery=None)
 
@@ -198,15 +323,23 @@ async def search_libraries(query: str) -> LibrarySearchResponse:
         except Exception:
             continue
 
-    print(f'{datetime.utcnow().isoformat()} [search_libraries] mcp response', {
-        'discovery': discovery.model_dump(),
-        'results': [doc.model_dump() for doc in converted_results]
-    })
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            '[search_libraries] mcp response discovery=%s results=%s',
+            discovery.model_dump_json(),
+            _dump_json(converted_results)
+        )
     return LibrarySearchResponse(source='mcp', results=converted_results, discovery=discovery)
 
 
+def _object_id(library_id: str) -> ObjectId:
+    if not ObjectId.is_valid(library_id):
+        raise HTTPException(status_code=400, detail='Invalid library id')
+    return ObjectId(library_id)
+
+
 async def get_library(library_id: str) -> LibraryDocument:
-    doc = await collection.find_one({'_id': ObjectId(library_id)})
+    doc = await collection.find_one({'_id': _object_id(library_id)})
     if not doc:
         raise HTTPException(status_code=404, detail='Library not found')
     return LibraryDocument(**doc)
@@ -215,72 +348,78 @@ async def get_library(library_id: str) -> LibraryDocument:
 async def create_library(payload: LibraryCreate) -> LibraryDocument:
     try:
         # Upsert by name + ecosystem to avoid duplicate library records
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         document = payload.model_dump(by_alias=True)
-        document['created_at'] = now
-        document['updated_at'] = now
-
-        ts = datetime.utcnow().isoformat()
-        print(f'{ts} [create_library] request', document)
-
-        existing = await collection.find_one({'name': payload.name, 'ecosystem': payload.ecosystem})
-        if existing:
-            # Update metadata if provided
-            update_fields = {}
-            if payload.description:
-                update_fields['description'] = payload.description
-            if payload.repository_url:
-                update_fields['repository_url'] = payload.repository_url
-            if getattr(payload, 'officialSite', None):
-                update_fields['officialSite'] = payload.officialSite
-            if payload.ecosystem:
-                update_fields['ecosystem'] = payload.ecosystem
-
-            # If version already exists, skip adding; else push new version
-            new_version = payload.versions[0] if payload.versions else None
-            if new_version:
-                version_exists = any(v.get('version') == new_version.version for v in existing.get('versions', []))
-                if not version_exists:
-                    update_fields['versions'] = existing.get('versions', []) + [new_version.model_dump()]
-
-            update_fields['updated_at'] = now
-            await collection.update_one({'_id': existing['_id']}, {'$set': update_fields})
-            updated_doc = await get_library(str(existing['_id']))
-            print(f'{datetime.utcnow().isoformat()} [create_library] update response', updated_doc.model_dump())
-            return updated_doc
-
-        result = await collection.insert_one(document)
-        created = await get_library(str(result.inserted_id))
-        print(f'{datetime.utcnow().isoformat()} [create_library] insert response', created.model_dump())
-        return created
+        logger.debug('[create_library] request %s', document)
+
+        is_insert = {'$eq': [{'$type': '$created_at'}, 'missing']}
+        # Metadata provided in the payload overwrites; missing values keep what is stored
+        fields: dict = {}
+        for key in ('description', 'repository_url', 'officialSite'):
+            value = document.get(key)
+            fields[key] = {'$literal': value} if value else {'$ifNull': [f'${key}', None]}
+
+        # New documents get every payload version; existing ones only gain the
+        # first payload version when it is not already recorded
+        versions = document.get('versions') or []
+        new_version = versions[0] if versions else None
+        existing_versions: dict | str = '$versions'
+        if new_version:
+            existing_versions = {'$cond': [
+                {'$in': [{'$literal': new_version['version']}, {'$ifNull': ['$versions.version', []]}]},
+                '$versions',
+                {'$concatArrays': [{'$ifNull': ['$versions', []]}, {'$literal': [new_version]}]},
+            ]}
+        fields['versions'] = {'$cond': [is_insert, {'$literal': versions}, existing_versions]}
+        fields['name_lower'] = {'$literal': payload.name.lower()}
+        fields['created_at'] = {'$ifNull': ['$created_at', now]}
+        fields['updated_at'] = now
+
+        query = {'name': payload.name, 'ecosystem': payload.ecosystem}
+        try:
+            doc = await collection.find_one_and_update(
+                query, [{'$set': fields}], upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent upsert inserted the same name+ecosystem first; retry as an update
+            doc = await collection.find_one_and_update(
+                query, [{'$set': fields}], upsert=True, return_document=ReturnDocument.AFTER
+            )
+        search_cache.clear()
+        result = LibraryDocument(**doc)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('[create_library] upsert response %s', result.model_dump_json())
+        return result
     except Exception as exc:
-        print(f'{datetime.utcnow().isoformat()} [create_library] error', {'error': str(exc)})
+        logger.error('[create_library] error: %s', exc)
         raise
 
 
 async def update_library(library_id: str, payload: LibraryUpdate) -> LibraryDocument:
     update_data = {k: v for k, v in payload.model_dump(exclude_none=True).items()}
-    update_data['updated_at'] = datetime.utcnow()
+    update_data['updated_at'] = datetime.now(timezone.utc)
     result = await collection.find_one_and_update(
-        {'_id': ObjectId(library_id)},
+        {'_id': _object_id(library_id)},
         {'$set': update_data},
         return_document=ReturnDocument.AFTER
     )
     if not result:
         raise HTTPException(status_code=404, detail='Library not found')
+    search_cache.clear()
     return LibraryDocument(**result)
 
 
 async def add_version(library_id: str, payload: VersionModel) -> LibraryDocument:
-    payload.created_at = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     result = await collection.find_one_and_update(
-        {'_id': ObjectId(library_id)},
+        {'_id': _object_id(library_id)},
         {
             '$push': {'versions': payload.model_dump()},
-            '$set': {'updated_at': datetime.utcnow()}
+            '$set': {'updated_at': now}
         },
         return_document=ReturnDocument.AFTER
     )
     if not result:
         raise HTTPException(status_code=404, detail='Library not found')
+    search_cache.clear()
     return LibraryDocument(**result)
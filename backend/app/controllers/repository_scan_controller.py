@@ -1,33 +1,126 @@
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List
+import logging
 import re
 from bson import ObjectId
+from bson.errors import InvalidDocument
 from fastapi import HTTPException
-from pymongo import ReturnDocument
-from ..database import get_database
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+from ..config import get_settings
+from ..database import fetch_validated, get_collection
 from ..models.repository_scan import (
+    SCAN_LIST_ADAPTER,
     RepositoryScanCreate,
     RepositoryScanDocument,
     RepositoryScanUpdate
 )
 
 
-collection = get_database()['repository_scans']
+logger = logging.getLogger(__name__)
+collection = get_collection('repository_scans')
+# Finished highest-risk scan responses per (repository_url, commit_sha), expired by a TTL index
+results_collection = get_collection('repository_scan_results')
 
+# Documents per getMore round trip
+_BATCH_SIZE = 500
+# Listing fields for summary views: dependency files without their libraries
+_SUMMARY_PROJECTION = {'dependencies.libraries': 0}
 
-async def list_repository_scans(limit: int | None = None) -> List[RepositoryScanDocument]:
-    cursor = collection.find().sort('updatedAt', -1)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def _escape(term: str) -> str:
+    return re.escape(term)
+
+
+async def ensure_indexes() -> None:
+    """Create the indexes backing repository scan search, listing and upserts.
+
+    Failures are logged rather than raised so index problems never block startup.
+    """
+    # Search matches substrings with $regex, which a text index can't serve;
+    # drop the one earlier versions created so it stops costing every write
+    try:
+        await collection.drop_index('repository_scans_text')
+    except OperationFailure:
+        pass
+    except PyMongoError as exc:
+        logger.warning('[repository_scans] could not drop index repository_scans_text: %s', exc)
+    indexes = [
+        ([('updatedAt', DESCENDING)], {}),
+        ([('repository_url', ASCENDING)], {}),
+    ]
+    for keys, options in indexes:
+        try:
+            await collection.create_index(keys, **options)
+        except PyMongoError as exc:
+            logger.warning('[repository_scans] could not create index %s: %s', keys, exc)
+    ttl = get_settings().scan_result_ttl_seconds
+    result_indexes = [([('repository_url', ASCENDING), ('commit_sha', ASCENDING)], {'unique': True})]
+    if ttl > 0:
+        result_indexes.append(([('createdAt', ASCENDING)], {'expireAfterSeconds': ttl}))
+    for keys, options in result_indexes:
+        try:
+            await results_collection.create_index(keys, **options)
+        except PyMongoError as exc:
+            logger.warning('[repository_scan_results] could not create index %s: %s', keys, exc)
+
+
+async def list_repository_scans(limit: int | None = None, summary: bool = False) -> List[RepositoryScanDocument]:
+    cursor = collection.find(projection=_SUMMARY_PROJECTION if summary else None).sort('updatedAt', -1).batch_size(_BATCH_SIZE)
     if limit and limit > 0:
         cursor = cursor.limit(limit)
-    docs = [RepositoryScanDocument(**doc) async for doc in cursor]
-    return docs
+    return await fetch_validated(cursor, SCAN_LIST_ADAPTER, _BATCH_SIZE)
 
 
-async def get_repository_scan(scan_id: str) -> RepositoryScanDocument:
+async def get_cached_scan_result(repository_url: str, commit_sha: str) -> Dict[str, Any] | None:
+    """Return the stored scan response for this commit, or None when absent or expired."""
+    ttl = get_settings().scan_result_ttl_seconds
+    if ttl <= 0:
+        return None
+    # The TTL monitor only runs once a minute; filter on age so stale entries never serve
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl)
     try:
-        oid = ObjectId(scan_id)
-    except Exception:
+        doc = await results_collection.find_one(
+            {'repository_url': repository_url, 'commit_sha': commit_sha, 'createdAt': {'$gt': cutoff}},
+            projection={'_id': 0, 'result': 1}
+        )
+    except PyMongoError as exc:
+        logger.warning('[repository_scan_results] lookup failed for %s@%s: %s', repository_url, commit_sha, exc)
+        return None
+    return doc['result'] if doc else None
+
+
+async def cache_scan_result(repository_url: str, commit_sha: str, result: Dict[str, Any]) -> None:
+    """Store a scan response for reuse by later scans of the same commit; failures are logged."""
+    if get_settings().scan_result_ttl_seconds <= 0:
+        return
+    try:
+        await results_collection.replace_one(
+            {'repository_url': repository_url, 'commit_sha': commit_sha},
+            {
+                'repository_url': repository_url,
+                'commit_sha': commit_sha,
+                'result': result,
+                'createdAt': datetime.now(timezone.utc),
+            },
+            upsert=True
+        )
+    except (PyMongoError, InvalidDocument) as exc:
+        logger.warning('[repository_scan_results] could not store %s@%s: %s', repository_url, commit_sha, exc)
+
+
+def _object_id(scan_id: str) -> ObjectId:
+    if not ObjectId.is_valid(scan_id):
         raise HTTPException(status_code=400, detail='Invalid scan id')
+    return ObjectId(scan_id)
+
+
+async def get_repository_scan(scan_id: str) -> RepositoryScanDocument:
+    oid = _object_id(scan_id)
     doc = await collection.find_one({'_id': oid})
     if not doc:
         raise HTTPException(status_code=404, detail='Scan not found')
@@ -36,7 +129,7 @@ async def get_repository_scan(scan_id: str) -> RepositoryScanDocument:
 
 async def create_repository_scan(payload: RepositoryScanCreate) -> RepositoryScanDocument:
     data = payload.model_dump(by_alias=True)
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     data['createdAt'] = data.get('createdAt') or now
     data['updatedAt'] = now
 
@@ -64,24 +157,21 @@ async def create_repository_scan(payload: RepositoryScanCreate) -> RepositorySca
         return_document=ReturnDocument.AFTER
     )
 
-    # If upsert inserted, doc may be None in Motor <3.4; fetch explicitly
+    # Defensive: fetch explicitly if the upsert returned no document
     if doc is None:
         doc = await collection.find_one(query)
     return RepositoryScanDocument(**doc)
 
 
 async def update_repository_scan(scan_id: str, payload: RepositoryScanUpdate) -> RepositoryScanDocument:
-    try:
-        oid = ObjectId(scan_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail='Invalid scan id')
+    oid = _object_id(scan_id)
     update_data = {k: v for k, v in payload.model_dump(by_alias=True).items() if v is not None}
     if not update_data:
         doc = await collection.find_one({'_id': oid})
         if not doc:
             raise HTTPException(status_code=404, detail='Scan not found')
         return RepositoryScanDocument(**doc)
-    update_data['updatedAt'] = datetime.utcnow()
+    update_data['updatedAt'] = datetime.now(timezone.utc)
     doc = await collection.find_one_and_update(
         {'_id': oid},
         {'$set': update_data},
@@ -98,12 +188,12 @@ async def search_repository_scans(query: str, limit: int | None = None) -> List[
     #
     # Support multi-term search like "Newtonsoft.Json 11.0.2" by requiring each
     # term to match at least one searchable field (AND across terms).
-    terms = [t for t in re.split(r"\s+", (query or "").strip()) if t]
+    terms = [t for t in _WHITESPACE_RE.split((query or "").strip()) if t]
     if not terms:
         return []
 
     def _term_or(term: str) -> dict:
-        escaped = re.escape(term)
+        escaped = _escape(term)
         regex = {'$regex': escaped, '$options': 'i'}
         return {
             '$or': [
@@ -117,41 +207,67 @@ async def search_repository_scans(query: str, limit: int | None = None) -> List[
         }
 
     mongo_query = _term_or(terms[0]) if len(terms) == 1 else {'$and': [_term_or(t) for t in terms]}
-    cursor = collection.find(mongo_query).sort('updatedAt', -1)
-    if limit and limit > 0:
-        cursor = cursor.limit(limit)
-    docs = [RepositoryScanDocument(**doc) async for doc in cursor]
 
     # If the query matches repo-level metadata, return the full scan (including all dependencies).
     # Otherwise, return a concise payload by filtering to matching dependency files / libraries.
-    patterns = [re.compile(re.escape(t), re.IGNORECASE) for t in terms]
-    filtered_docs: List[RepositoryScanDocument] = []
-    for doc in docs:
-        repo_blob = " ".join([(doc.repository_url or ""), (doc.repository_name or ""), (doc.repository_platform or "")])
-        repo_level_hit = all(p.search(repo_blob) for p in patterns)
-        if repo_level_hit:
-            filtered_docs.append(doc)
-            continue
-
-        filtered_deps = []
-        for dep in doc.dependencies or []:
-            path_hit = any(p.search(dep.library_path or '') for p in patterns)
-
-            matched_libs = []
-            for lib in dep.libraries or []:
-                hay = f"{lib.library_name or ''} {lib.library_version or ''}"
-                if all(p.search(hay) for p in patterns):
-                    matched_libs.append(lib)
-
-            if path_hit:
-                # If the dependency file path matched, keep the whole file block (libraries included)
-                filtered_deps.append(dep)
-            elif matched_libs:
-                # Otherwise keep only the matching libraries
-                filtered_deps.append(type(dep)(library_path=dep.library_path, libraries=matched_libs))
-
-        if filtered_deps:
-            doc.dependencies = filtered_deps
-            filtered_docs.append(doc)
-
-    return filtered_docs
+    # The filtering runs server-side so only matching sub-documents travel over the wire.
+    # The terms are literal substrings: lowercase them once here and the
+    # haystack once per evaluation, then use plain substring lookups
+    terms_lc = list(dict.fromkeys(t.lower() for t in terms))
+
+    def _terms_in(value: dict, combine: str) -> dict:
+        return {'$let': {
+            'vars': {'hay': {'$toLower': value}},
+            'in': {combine: [
+                {'$gte': [{'$indexOfCP': ['$$hay', {'$literal': t}]}, 0]} for t in terms_lc
+            ]},
+        }}
+
+    def _all_terms(value: dict) -> dict:
+        return _terms_in(value, '$and')
+
+    def _any_term(value: dict) -> dict:
+        return _terms_in(value, '$or')
+
+    repo_blob = {'$concat': [
+        {'$ifNull': ['$repository_url', '']}, ' ',
+        {'$ifNull': ['$repository_name', '']}, ' ',
+        {'$ifNull': ['$repository_platform', '']},
+    ]}
+    path_hit = _any_term({'$ifNull': ['$$dep.library_path', '']})
+    lib_hit = _all_terms({'$concat': [
+        {'$ifNull': ['$$lib.library_name', '']}, ' ',
+        {'$ifNull': ['$$lib.library_version', '']},
+    ]})
+    # Keep the whole file block when its path matched, otherwise only the matching libraries
+    narrowed_deps = {'$map': {
+        'input': {'$ifNull': ['$dependencies', []]},
+        'as': 'dep',
+        'in': {'$cond': [
+            path_hit,
+            '$$dep',
+            {'$mergeObjects': ['$$dep', {'libraries': {'$filter': {
+                'input': {'$ifNull': ['$$dep.libraries', []]},
+                'as': 'lib',
+                'cond': lib_hit,
+            }}}]},
+        ]},
+    }}
+    kept_deps = {'$filter': {
+        'input': narrowed_deps,
+        'as': 'dep',
+        'cond': {'$or': [path_hit, {'$gt': [{'$size': {'$ifNull': ['$$dep.libraries', []]}}, 0]}]},
+    }}
+
+    pipeline: List[dict] = [
+        {'$match': mongo_query},
+        {'$sort': {'updatedAt': -1}},
+        {'$addFields': {'_repo_hit': _all_terms(repo_blob)}},
+        {'$addFields': {'dependencies': {'$cond': ['$_repo_hit', '$dependencies', kept_deps]}}},
+        {'$match': {'$or': [{'_repo_hit': True}, {'dependencies.0': {'$exists': True}}]}},
+        {'$project': {'_repo_hit': 0}},
+    ]
+    if limit and limit > 0:
+        pipeline.append({'$limit': limit})
+    cursor = await collection.aggregate(pipeline, batchSize=_BATCH_SIZE)
+    return await fetch_validated(cursor, SCAN_LIST_ADAPTER, _BATCH_SIZE)
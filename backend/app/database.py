@@ -1,18 +1,88 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+from typing import Any, Dict, List
+from pymongo import AsyncMongoClient
+from pydantic import TypeAdapter
 from .config import get_settings
 
 
 settings = get_settings()
-_client: AsyncIOMotorClient | None = None
+# One client per event loop: an async client is bound to the loop it first ran on,
+# so workers/tests running their own loops must not share a single instance
+_clients: Dict[asyncio.AbstractEventLoop | None, AsyncMongoClient] = {}
 
 
-def get_client() -> AsyncIOMotorClient:
-    global _client
-    if _client is None:
-        _client = AsyncIOMotorClient(settings.mongodb_uri)
-    return _client
+def _current_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_client() -> AsyncMongoClient:
+    # No await between lookup and insert, so this is race-free within a loop
+    loop = _current_loop()
+    client = _clients.get(loop)
+    if client is None:
+        options: Dict[str, Any] = {
+            'compressors': settings.mongodb_compressors,
+            'zlibCompressionLevel': settings.mongodb_zlib_level,
+            'maxPoolSize': settings.mongodb_max_pool_size,
+            'minPoolSize': settings.mongodb_min_pool_size,
+            'maxIdleTimeMS': settings.mongodb_max_idle_ms,
+            'waitQueueTimeoutMS': settings.mongodb_wait_queue_timeout_ms,
+            'serverSelectionTimeoutMS': settings.mongodb_server_selection_timeout_ms,
+        }
+        client = _clients[loop] = AsyncMongoClient(settings.mongodb_uri, **options)
+    return client
+
+
+async def ping() -> None:
+    """Round-trip to the server so the pool opens its minPoolSize sockets up front."""
+    await get_client().admin.command('ping')
+
+
+async def close_client() -> None:
+    """Close and forget the client bound to the current event loop, if any."""
+    client = _clients.pop(_current_loop(), None)
+    if client is not None:
+        await client.close()
 
 
 def get_database():
     client = get_client()
     return client[settings.database_name]
+
+
+class LoopBoundCollection:
+    """Module-level collection handle that resolves against the current loop's client."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(get_database()[self.name], attr)
+
+
+def get_collection(name: str) -> LoopBoundCollection:
+    return LoopBoundCollection(name)
+
+
+async def fetch_validated(cursor, adapter: TypeAdapter, batch_size: int = 500) -> List[Any]:
+    """Drain a cursor batch by batch, validating each batch with `adapter`.
+
+    The next batch is requested before the current one is validated so the
+    getMore round trip overlaps with the pydantic work instead of following it.
+    """
+    results: List[Any] = []
+    batch = await cursor.to_list(length=batch_size)
+    while batch:
+        next_batch = asyncio.ensure_future(cursor.to_list(length=batch_size))
+        # Let the prefetch start before the (synchronous) validation below
+        await asyncio.sleep(0)
+        try:
+            results.extend(adapter.validate_python(batch))
+        except Exception:
+            next_batch.cancel()
+            raise
+        batch = await next_batch
+    return results
@@ -1,22 +1,53 @@
+import asyncio
+import os
+import sys
 import uvicorn
 import logging
 import logging.config
 import copy
+from contextlib import AsyncExitStack, asynccontextmanager
 from uvicorn.config import LOGGING_CONFIG
+import orjson
+from bson import ObjectId
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from pymongo.errors import PyMongoError
+from .database import close_client, ping
+from .services.file_analyzer import close_registry_client, parse_cache_info, registry_cache_info
+from .services.mcp_client import close_mcp_http_client
+from .services.repo_scanner import shutdown_analyze_pool
+from .controllers.library_controller import ensure_indexes as ensure_library_indexes
+from .controllers.repository_scan_controller import ensure_indexes as ensure_repository_scan_indexes
 from .views.library_view import router as library_router
 from .views.repository_scan_view import router as repository_scan_router
-from dotenv import load_dotenv
-import os
-from pathlib import Path
 
 
-# .env'yi api klasöründen yükle
-BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env")
+_logging_configured = False
 
-def create_app() -> FastAPI:
+
+def _orjson_default(obj):
+    # Routes returning raw dicts may still carry ObjectIds
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError
+
+
+class AppJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def _configure_logging() -> None:
+    # create_app() can run more than once per process (reload, tests); configure once
+    global _logging_configured
+    if _logging_configured:
+        return
     log_config = copy.deepcopy(LOGGING_CONFIG)
     log_fmt = '%(asctime)s %(levelname)s %(message)s'
     log_config['formatters']['default']['fmt'] = log_fmt
@@ -30,18 +61,47 @@ def create_app() -> FastAPI:
     }
     
     logging.config.dictConfig(log_config)
+    _logging_configured = True
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Cleanups are registered before startup work, so a failed startup still
+    # closes everything; they run in reverse order on shutdown
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(close_mcp_http_client)
+        stack.push_async_callback(asyncio.to_thread, close_registry_client)
+        stack.callback(shutdown_analyze_pool)
+        stack.push_async_callback(close_client)
+        try:
+            await ping()
+        except PyMongoError as exc:
+            logging.getLogger('app').warning('[startup] MongoDB ping failed: %s', exc)
+        await ensure_library_indexes()
+        await ensure_repository_scan_indexes()
+        yield
+
 
-    app = FastAPI(title='LicenGuard API', version='0.1.0')
+def create_app() -> FastAPI:
+    _configure_logging()
+
+    app = FastAPI(title='LicenGuard API', version='0.1.0', default_response_class=AppJSONResponse, lifespan=_lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=['*'],
         allow_methods=['*'],
         allow_headers=['*']
     )
+    # Scan listings carry nested dependency arrays; small bodies are left alone
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
     @app.get('/health')
     async def health():
-        return {'status': 'ok'}
+        return {
+            'status': 'ok',
+            'analyze_cache': parse_cache_info(),
+            'registry_cache': registry_cache_info()
+        }
 
     app.include_router(library_router)
     app.include_router(repository_scan_router)
@@ -52,4 +112,13 @@ app = create_app()
 
 
 if __name__ == '__main__':
-    uvicorn.run('app.main:app', reload=True)
+    workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+    uvicorn.run(
+        'app.main:app',
+        # uvicorn refuses reload together with multiple workers
+        reload=workers == 1,
+        workers=workers,
+        # uvloop has no Windows build; fall back to the stdlib loop there
+        loop='asyncio' if sys.platform == 'win32' else 'uvloop',
+        http='httptools'
+    )
@@ -1,16 +1,25 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Literal, Optional, Union, Dict
 from bson import ObjectId
-from pydantic import BaseModel, Field, ValidationInfo, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr, TypeAdapter
+from pydantic_core import core_schema
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class PyObjectId(ObjectId):
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used='json')
+        )
 
     @classmethod
-    def validate(cls, v, info: ValidationInfo | None = None):
+    def validate(cls, v):
+        # Values read from Mongo are already ObjectIds; skip the string parse
         if isinstance(v, ObjectId):
             return v
         if not ObjectId.is_valid(v):
@@ -18,10 +27,8 @@ class PyObjectId(ObjectId):
         return ObjectId(v)
 
     @classmethod
-    def __get_pydantic_json_schema__(cls, core_schema, handler):
-        json_schema = handler(core_schema)
-        json_schema.update(type='string', examples=['6650f7ab5b4c4e2b3c1a1234'])
-        return json_schema
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {'type': 'string', 'examples': ['6650f7ab5b4c4e2b3c1a1234']}
 
 
 class LicenseSummaryItem(BaseModel):
@@ -67,9 +74,12 @@ class LibraryUpdate(BaseModel):
 
 class LibraryDocument(LibraryBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias='_id')
+    name_lower: Optional[str] = Field(default=None, exclude=True, description='Lowercased name used for indexed lookups')
     versions: List[VersionModel] = Field(default_factory=list)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
+    # Normalized version -> VersionModel, built on first lookup (never serialized)
+    _version_index: Optional[Dict[str, VersionModel]] = PrivateAttr(default=None)
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
@@ -107,3 +117,8 @@ class LibrarySearchResponse(BaseModel):
     results: List[LibraryDocument] = Field(default_factory=list)
     discovery: Optional[LibraryDiscoveryReport] = None
     model_config = ConfigDict(json_encoders={ObjectId: str})
+
+
+# Module-level adapters so list results are validated/serialized in one
+# pydantic-core call instead of per-model work on every request
+LIBRARY_LIST_ADAPTER = TypeAdapter(List[LibraryDocument])
@@ -1,8 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
 from bson import ObjectId
-from pydantic import BaseModel, Field, ConfigDict
-from .library import PyObjectId
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+from .library import PyObjectId, utcnow
 
 
 class RepoLibrary(BaseModel):
@@ -41,11 +41,14 @@ class RepositoryScanUpdate(BaseModel):
 
 class RepositoryScanDocument(RepositoryScanBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias='_id')
-    createdAt: datetime = Field(default_factory=datetime.utcnow)
-    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    createdAt: datetime = Field(default_factory=utcnow)
+    updatedAt: datetime = Field(default_factory=utcnow)
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
         json_encoders={ObjectId: str, PyObjectId: str},
         extra='allow'
     )
+
+
+SCAN_LIST_ADAPTER = TypeAdapter(List[RepositoryScanDocument])
@@ -1,36 +1,112 @@
-import json
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+import weakref
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
-import urllib.request
-import urllib.error
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextvars import ContextVar
+from functools import partial, wraps
+from typing import Awaitable, Callable, List, Dict, Any, Iterator, Tuple
+import httpx
+import orjson
+
+
+_NPM_SECTIONS = ("dependencies", "devDependencies", "peerDependencies")
+
+# Version strings like "^18.2.0" repeat across manifests; share one object per
+# value. Bounded: the pool is simply dropped once it grows past the cap.
+_VERSION_POOL: Dict[str, str] = {}
+_VERSION_POOL_MAX = 10_000
+
+
+def _shared_version(version: Any) -> Any:
+    if not isinstance(version, str):
+        return version
+    shared = _VERSION_POOL.get(version)
+    if shared is None:
+        if len(_VERSION_POOL) >= _VERSION_POOL_MAX:
+            _VERSION_POOL.clear()
+        shared = _VERSION_POOL.setdefault(version, version)
+    return shared
 
 
 def detect_package_manager(filename: str, content: str) -> str:
+    # A recognizable filename decides on its own; content is only sniffed otherwise
     lowered = filename.lower()
-    snippet = content[:200].lower()
-    if "package.json" in lowered or '"dependencies"' in snippet:
+    if "package.json" in lowered:
         return "npm"
-    if lowered.endswith("requirements.txt") or "pip" in snippet:
+    if lowered.endswith("requirements.txt"):
         return "pypi"
     if lowered.endswith("pom.xml"):
         return "maven"
-    if lowered.find("packages.config") != -1 or "nuget" in snippet:
+    if "packages.config" in lowered or lowered.endswith(".csproj"):
         return "nuget"
-    if lowered.endswith(".csproj") or "nuget" in snippet:
+    snippet = content[:200].lower()
+    if '"dependencies"' in snippet:
+        return "npm"
+    if "pip" in snippet:
+        return "pypi"
+    if "nuget" in snippet:
         return "nuget"
     return "unknown"
 
 
 def parse_package_json(text: str) -> List[Dict[str, Any]]:
     try:
-        data = json.loads(text)
-    except json.JSONDecodeError:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError:
         return []
-    deps = []
-    for section in ("dependencies", "devDependencies", "peerDependencies"):
-        for name, version in (data.get(section) or {}).items():
-            deps.append({"name": name, "version": version})
-    return deps
+    return [
+        {"name": sys.intern(name), "version": _shared_version(version)}
+        for section in _NPM_SECTIONS
+        for name, version in (data.get(section) or {}).items()
+    ]
+
+def _local_name(tag: str) -> str:
+    return tag.split('}')[-1] if '}' in tag else tag
+
+
+# Characters fed to the pull parser at a time
+_XML_FEED_CHUNK = 1 << 16
+
+
+def _xml_events(content: str) -> Iterator[Tuple[str, ET.Element]]:
+    # Feeding str (not bytes) makes expat ignore the declared encoding, as
+    # ET.fromstring does: the text is already decoded, whatever the prolog says
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    for start in range(0, len(content), _XML_FEED_CHUNK):
+        parser.feed(content[start:start + _XML_FEED_CHUNK])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _iter_xml_elements(content: str, tag: str) -> Iterator[ET.Element]:
+    """Stream completed `tag` elements (namespace-agnostic) without keeping the whole tree.
+
+    Each yielded element is cleared once the caller is done with it, and unrelated
+    elements are cleared as soon as they close. Raises ET.ParseError on bad XML.
+    """
+    # Match '{ns}tag' or bare 'tag' directly instead of splitting every tag
+    suffix = '}' + tag
+    inside = 0
+    for event, elem in _xml_events(content):
+        elem_tag = elem.tag
+        hit = elem_tag == tag or elem_tag.endswith(suffix)
+        if event == 'start':
+            if hit:
+                inside += 1
+            continue
+        if hit:
+            inside -= 1
+            yield elem
+            elem.clear()
+        elif not inside:
+            elem.clear()
+
 
 def parse_csproj_file(content: str) -> List[Dict[str, Any]]:
     """Parse a .csproj file content and extract PackageReference entries.
@@ -39,35 +115,25 @@ def parse_csproj_file(content: str) -> List[Dict[str, Any]]:
     Handles both attribute-style (`<PackageReference Include="Foo" Version="1.2.3" />`)
     and nested `<Version>` child elements. Works with XML namespaces.
     """
+    deps: List[Dict[str, Any]] = []
     try:
-        root = ET.fromstring(content)
+        for elem in _iter_xml_elements(content, 'PackageReference'):
+            # Name can be in Include or Update attribute
+            name = elem.get('Include') or elem.get('Update')
+
+            # Version can be an attribute or a child <Version> element
+            version = elem.get('Version')
+            if version is None:
+                for child in elem:
+                    if _local_name(child.tag) == 'Version' and (child.text or '').strip():
+                        version = child.text.strip()
+                        break
+
+            if name:
+                deps.append({"name": name, "version": version})
     except ET.ParseError:
         return []
 
-    deps: List[Dict[str, Any]] = []
-
-    def local_name(tag: str) -> str:
-        return tag.split('}')[-1] if '}' in tag else tag
-
-    # Iterate through all elements and find PackageReference nodes
-    for elem in root.iter():
-        if local_name(elem.tag) != 'PackageReference':
-            continue
-
-        # Name can be in Include or Update attribute
-        name = elem.get('Include') or elem.get('Update')
-
-        # Version can be an attribute or a child <Version> element
-        version = elem.get('Version')
-        if version is None:
-            for child in list(elem):
-                if local_name(child.tag) == 'Version' and (child.text or '').strip():
-                    version = (child.text or '').strip()
-                    break
-
-        if name:
-            deps.append({"name": name, "version": version})
-
     return deps
 
 def parse_maven_pom(text: str) -> List[Dict[str, Any]]:
@@ -77,50 +143,56 @@ def parse_maven_pom(text: str) -> List[Dict[str, Any]]:
     """
     deps: List[Dict[str, Any]] = []
     try:
-        root = ET.fromstring(text)
+        # Stream <dependency> elements (handle XML namespaces)
+        for elem in _iter_xml_elements(text, 'dependency'):
+            group_id = None
+            artifact_id = None
+            version = None
+            scope = None
+
+            for child in elem:
+                child_name = _local_name(child.tag)
+                child_text = (child.text or '').strip()
+
+                if child_name == 'groupId':
+                    group_id = child_text
+                elif child_name == 'artifactId':
+                    artifact_id = child_text
+                elif child_name == 'version':
+                    version = child_text
+                elif child_name == 'scope':
+                    scope = child_text
+
+            # Skip test dependencies
+            if scope == 'test':
+                continue
+
+            if group_id and artifact_id:
+                # Maven convention: groupId:artifactId
+                deps.append({
+                    "name": f"{group_id}:{artifact_id}",
+                    "version": version,
+                    "groupId": group_id,
+                    "artifactId": artifact_id
+                })
     except ET.ParseError:
         return []
-    
-    def local_name(tag: str) -> str:
-        return tag.split('}')[-1] if '}' in tag else tag
-    
-    # Find all <dependency> elements (handle XML namespaces)
-    for elem in root.iter():
-        if local_name(elem.tag) != 'dependency':
-            continue
-        
-        group_id = None
-        artifact_id = None
-        version = None
-        scope = None
-        
-        for child in list(elem):
-            child_name = local_name(child.tag)
-            child_text = (child.text or '').strip()
-            
-            if child_name == 'groupId':
-                group_id = child_text
-            elif child_name == 'artifactId':
-                artifact_id = child_text
-            elif child_name == 'version':
-                version = child_text
-            elif child_name == 'scope':
-                scope = child_text
-        
-        # Skip test dependencies
-        if scope == 'test':
+
+    return deps
+
+
+def _parse_pip(text: str) -> List[Dict[str, Any]]:
+    """Parse pip-style lines (`name` or `name==version`), skipping blanks and comments."""
+    deps: List[Dict[str, Any]] = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line[0] == "#":
             continue
-        
-        if group_id and artifact_id:
-            # Maven convention: groupId:artifactId
-            name = f"{group_id}:{artifact_id}"
-            deps.append({
-                "name": name,
-                "version": version,
-                "groupId": group_id,
-                "artifactId": artifact_id
-            })
-    
+        name, sep, ver = line.partition("==")
+        if sep:
+            deps.append({"name": sys.intern(name.rstrip()), "version": _shared_version(ver.lstrip())})
+        else:
+            deps.append({"name": sys.intern(line), "version": None})
     return deps
 
 
@@ -133,20 +205,11 @@ def parse_requirements(text: str, filename: str="") -> List[Dict[str, Any]]:
 
     if filename and filename.lower().endswith(".csproj"):
         deps = parse_csproj_file(content=text_stripped)
-    elif (filename and filename.lower().find("packages.config") != -1):
+    elif (filename and "packages.config" in filename.lower()):
         return parse_packages_config(text)
     else:
         # Default: pip-style requirements
-        deps = []
-        for raw in text.splitlines():
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "==" in line:
-                name, ver = line.split("==", 1)
-                deps.append({"name": name.strip(), "version": ver.strip()})
-            else:
-                deps.append({"name": line, "version": None})
+        deps = _parse_pip(text)
     return deps
 
 
@@ -157,169 +220,498 @@ def parse_packages_config(text: str) -> List[Dict[str, Any]]:
     """
     deps: List[Dict[str, Any]] = []
     try:
-        root = ET.fromstring(text)
         # Handle <packages><package id="..." version="..." /></packages>
-        for pkg in root.findall('.//package'):
+        for pkg in _iter_xml_elements(text, 'package'):
             name = pkg.get('id') or pkg.get('Id') or pkg.get('name')
             version = pkg.get('version') or pkg.get('Version')
             if name:
                 deps.append({"name": name, "version": version})
     except ET.ParseError:
         # Fall back to pip-style parsing if XML parsing fails
-        for raw in text.splitlines():
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "==" in line:
-                name, ver = line.split("==", 1)
-                deps.append({"name": name.strip(), "version": ver.strip()})
-            else:
-                deps.append({"name": line, "version": None})
+        deps = _parse_pip(text)
     return deps
 
 
-def get_latest_npm_version(package_name: str) -> str | None:
-    """Get the latest version of an npm package."""
+# Registry lookups fan out concurrently over one pooled client (see _background_loop)
+_REGISTRY_TIMEOUT = httpx.Timeout(5.0)
+_REGISTRY_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+# Connect-level retries only; a failed lookup just leaves the version unset
+_REGISTRY_RETRIES = 2
+
+
+def _registry_client() -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(limits=_REGISTRY_LIMITS, http2=True, retries=_REGISTRY_RETRIES)
+    return httpx.AsyncClient(timeout=_REGISTRY_TIMEOUT, transport=transport)
+
+
+class _NotModified(Exception):
+    """A conditional registry request came back 304; the cached answer still holds."""
+
+
+# Validators (ETag / Last-Modified) of the cached answer being refreshed. _get_json
+# sends them as conditional headers and replaces them with the response's own.
+_validators: ContextVar[Dict[str, str] | None] = ContextVar("registry_validators", default=None)
+
+
+# Per-host concurrency caps keep a large fan-out under the registries' rate limits;
+# throttled or unavailable responses are retried with backoff, honouring Retry-After
+_HOST_CONCURRENCY = {
+    "registry.npmjs.org": 32,
+    "pypi.org": 16,
+    "search.maven.org": 8,
+    "api.nuget.org": 16,
+    "proxy.golang.org": 16,
+}
+_DEFAULT_HOST_CONCURRENCY = 16
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_RETRY_ATTEMPTS = 3
+_RETRY_BACKOFF_SECONDS = 0.5
+_RETRY_AFTER_MAX_SECONDS = 10.0
+_host_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    # Semaphores bind to the loop they are first awaited on, so keep one set per loop
+    semaphores = _host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(host)
+    if semaphore is None:
+        semaphore = semaphores[host] = asyncio.Semaphore(_HOST_CONCURRENCY.get(host, _DEFAULT_HOST_CONCURRENCY))
+    return semaphore
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), _RETRY_AFTER_MAX_SECONDS)
+    return _RETRY_BACKOFF_SECONDS * 2 ** attempt
+
+
+async def _get_json(client: httpx.AsyncClient, url: str) -> Any:
+    validators = _validators.get()
+    headers = {}
+    if validators:
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
     try:
-        url = f"https://registry.npmjs.org/{package_name}/latest"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            return data.get("version")
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError, KeyError, Exception):
+        async with _host_semaphore(httpx.URL(url).host):
+            for attempt in range(_RETRY_ATTEMPTS):
+                response = await client.get(url, headers=headers)
+                if response.status_code not in _RETRY_STATUSES or attempt == _RETRY_ATTEMPTS - 1:
+                    break
+                await asyncio.sleep(_retry_delay(response, attempt))
+        if response.status_code == 304 and headers:
+            raise _NotModified()
+        if response.is_error:
+            return None
+        data = orjson.loads(response.content)
+    except (httpx.HTTPError, orjson.JSONDecodeError):
         return None
+    if validators is not None:
+        validators.clear()
+        validators.update((name, response.headers[name]) for name in ("etag", "last-modified") if name in response.headers)
+    return data
+
+
+# Latest-version answers are shared across scans for an hour. Lookups run on
+# per-call event loops in worker threads, so the cache and the in-flight map use
+# a threading lock and concurrent futures rather than loop-bound asyncio primitives;
+# concurrent lookups of one package collapse into a single request. Expired
+# entries are revalidated with their ETag / Last-Modified, so a 304 renews them
+# without downloading or parsing the body again.
+_LATEST_TTL_SECONDS = 3600.0
+_LATEST_CACHE_SIZE = 10_000
+_latest_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, str, Dict[str, str]]]" = OrderedDict()
+_latest_pending: Dict[Tuple[Any, ...], Future] = {}
+_latest_lock = threading.Lock()
+
+
+async def _cached_latest(key: Tuple[Any, ...], fetch: Callable[[], Awaitable[str | None]]) -> str | None:
+    with _latest_lock:
+        hit = _latest_cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            _latest_cache.move_to_end(key)
+            return hit[1]
+        pending = _latest_pending.get(key)
+        if pending is None:
+            pending = _latest_pending[key] = Future()
+            # Running futures ignore cancel(), so a cancelled waiter can't void the owner's result
+            pending.set_running_or_notify_cancel()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        return await asyncio.wrap_future(pending)
+
+    validators = dict(hit[2]) if hit is not None else {}
+    token = _validators.set(validators)
+    try:
+        value = await fetch()
+    except _NotModified:
+        value = hit[1]
+    except BaseException as exc:
+        with _latest_lock:
+            _latest_pending.pop(key, None)
+        pending.set_exception(exc)
+        raise
+    finally:
+        _validators.reset(token)
+    with _latest_lock:
+        _latest_pending.pop(key, None)
+        # Misses are not cached: a None may just be a timeout
+        if value:
+            _latest_cache[key] = (time.monotonic() + _LATEST_TTL_SECONDS, value, validators)
+            _latest_cache.move_to_end(key)
+            if len(_latest_cache) > _LATEST_CACHE_SIZE:
+                _latest_cache.popitem(last=False)
+    pending.set_result(value)
+    return value
+
+
+def _registry_cached(ecosystem: str):
+    def decorator(fetch):
+        @wraps(fetch)
+        async def wrapper(client: httpx.AsyncClient, *args: str) -> str | None:
+            return await _cached_latest((ecosystem, *args), lambda: fetch(client, *args))
+        return wrapper
+    return decorator
+
+
+def registry_cache_info() -> Dict[str, int]:
+    with _latest_lock:
+        return {"size": len(_latest_cache), "maxsize": _LATEST_CACHE_SIZE, "pending": len(_latest_pending)}
+
+
+@_registry_cached("npm")
+async def get_latest_npm_version(client: httpx.AsyncClient, package_name: str) -> str | None:
+    """Get the latest version of an npm package."""
+    data = await _get_json(client, f"https://registry.npmjs.org/{package_name}/latest")
+    return data.get("version") if isinstance(data, dict) else None
 
 
-def get_latest_pypi_version(package_name: str) -> str | None:
+@_registry_cached("pypi")
+async def get_latest_pypi_version(client: httpx.AsyncClient, package_name: str) -> str | None:
     """Get the latest version of a PyPI package."""
-    try:
-        url = f"https://pypi.org/pypi/{package_name}/json"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            info = data.get("info", {})
-            version = info.get("version")
-            return version
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError, KeyError, Exception):
+    data = await _get_json(client, f"https://pypi.org/pypi/{package_name}/json")
+    if not isinstance(data, dict):
         return None
+    return (data.get("info") or {}).get("version")
 
 
-def get_latest_maven_version(group_id: str, artifact_id: str) -> str | None:
+@_registry_cached("maven")
+async def get_latest_maven_version(client: httpx.AsyncClient, group_id: str, artifact_id: str) -> str | None:
     """Get the latest version of a Maven artifact."""
-    try:
-        # Maven Central search API
-        url = f"https://search.maven.org/solrsearch/select?q=g:{group_id}+AND+a:{artifact_id}&rows=1&wt=json"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            docs = data.get("response", {}).get("docs", [])
-            if docs:
-                return docs[0].get("latestVersion")
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError, KeyError, Exception):
+    # Maven Central search API
+    url = f"https://search.maven.org/solrsearch/select?q=g:{group_id}+AND+a:{artifact_id}&rows=1&wt=json"
+    data = await _get_json(client, url)
+    if not isinstance(data, dict):
         return None
+    docs = (data.get("response") or {}).get("docs") or []
+    return docs[0].get("latestVersion") if docs else None
+
+
+# Solr OR-queries fold many Maven coordinates into one search; chunked to keep URLs short
+_MAVEN_BATCH_SIZE = 50
+
 
+async def prefetch_latest_maven_versions(client: httpx.AsyncClient, coordinates: List[Tuple[str, str]]) -> None:
+    """Seed the latest-version cache for many Maven artifacts with batched solr queries.
 
-def get_latest_nuget_version(package_name: str) -> str | None:
+    Coordinates the batch can't answer are left to the per-artifact lookup.
+    """
+    now = time.monotonic()
+    with _latest_lock:
+        missing = list(dict.fromkeys(
+            coord for coord in coordinates
+            if ("maven", *coord) not in _latest_pending
+            and (_latest_cache.get(("maven", *coord)) or (0.0, ""))[0] <= now
+        ))
+    if len(missing) < 2:
+        return
+
+    async def fetch_chunk(chunk: List[Tuple[str, str]]) -> Any:
+        query = " OR ".join(f'(g:"{group_id}" AND a:"{artifact_id}")' for group_id, artifact_id in chunk)
+        params = {"q": query, "rows": str(len(chunk)), "wt": "json"}
+        return await _get_json(client, str(httpx.URL("https://search.maven.org/solrsearch/select", params=params)))
+
+    chunks = [missing[i:i + _MAVEN_BATCH_SIZE] for i in range(0, len(missing), _MAVEN_BATCH_SIZE)]
+    responses = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+    expires = time.monotonic() + _LATEST_TTL_SECONDS
+    with _latest_lock:
+        for data in responses:
+            docs = ((data.get("response") or {}).get("docs") or []) if isinstance(data, dict) else []
+            for doc in docs:
+                if doc.get("g") and doc.get("a") and doc.get("latestVersion"):
+                    key = ("maven", doc["g"], doc["a"])
+                    _latest_cache[key] = (expires, doc["latestVersion"], {})
+                    _latest_cache.move_to_end(key)
+        while len(_latest_cache) > _LATEST_CACHE_SIZE:
+            _latest_cache.popitem(last=False)
+
+
+@_registry_cached("nuget")
+async def get_latest_nuget_version(client: httpx.AsyncClient, package_name: str) -> str | None:
     """Get the latest version of a NuGet package."""
-    try:
-        url = f"https://api.nuget.org/v3-flatcontainer/{package_name.lower()}/index.json"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            versions = data.get("versions", [])
-            if versions:
-                # Return the last (latest) version
-                return versions[-1]
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError, KeyError, Exception):
-        return None
+    data = await _get_json(client, f"https://api.nuget.org/v3-flatcontainer/{package_name.lower()}/index.json")
+    versions = data.get("versions") if isinstance(data, dict) else None
+    # Return the last (latest) version
+    return versions[-1] if versions else None
 
 
-def get_latest_go_version(module_path: str) -> str | None:
+@_registry_cached("go")
+async def get_latest_go_version(client: httpx.AsyncClient, module_path: str) -> str | None:
     """Get the latest version of a Go module."""
-    try:
-        # Go module proxy
-        url = f"https://proxy.golang.org/{module_path}/@latest"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            return data.get("Version")
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError, KeyError, Exception):
+    # Go module proxy
+    data = await _get_json(client, f"https://proxy.golang.org/{module_path}/@latest")
+    return data.get("Version") if isinstance(data, dict) else None
+
+
+def _maven_coordinates(dep: Dict[str, Any]) -> Tuple[str, str] | None:
+    name = dep.get("name") or ""
+    # Maven format: groupId:artifactId
+    if ":" in name:
+        group_id, artifact_id = name.split(":", 1)
+        return group_id, artifact_id
+    # Also check if we have separate groupId/artifactId fields
+    if dep.get("groupId") and dep.get("artifactId"):
+        return dep["groupId"], dep["artifactId"]
+    return None
+
+
+def _latest_version_lookup(client: httpx.AsyncClient, dep: Dict[str, Any], ecosystem: str):
+    """Return (coroutine, version_source) for a dependency, or None if unsupported."""
+    name = dep.get("name")
+    if not name:
         return None
+    if ecosystem == "npm":
+        return get_latest_npm_version(client, name), "latest_from_npm"
+    if ecosystem == "pypi":
+        return get_latest_pypi_version(client, name), "latest_from_pypi"
+    if ecosystem == "maven":
+        coordinates = _maven_coordinates(dep)
+        if coordinates is None:
+            return None
+        return get_latest_maven_version(client, *coordinates), "latest_from_maven"
+    if ecosystem == "nuget":
+        return get_latest_nuget_version(client, name), "latest_from_nuget"
+    if ecosystem == "go":
+        # Use full_name if available (includes module path), otherwise use name
+        return get_latest_go_version(client, dep.get("full_name") or name), "latest_from_goproxy"
+    return None
+
+
+async def enrich_dependencies_with_latest_versions_async(
+    dependencies: List[Dict[str, Any]],
+    ecosystem: str,
+    client: httpx.AsyncClient | None = None
+) -> List[Dict[str, Any]]:
+    """Fill in missing versions with the registry's latest, looking all of them up concurrently.
 
-
-def enrich_dependencies_with_latest_versions(dependencies: List[Dict[str, Any]], ecosystem: str) -> List[Dict[str, Any]]:
-    """Enrich dependencies that don't have versions with their latest versions.
-    
     Supports: npm, pypi, maven, nuget, go
     """
-    enriched = []
-    for dep in dependencies:
-        name = dep.get("name")
-        version = dep.get("version")
-        
-        # Skip if version already exists
-        if version:
-            enriched.append(dep)
-            continue
-        
-        latest_version = None
-        version_source = None
-        
-        if ecosystem == "npm" and name:
-            latest_version = get_latest_npm_version(name)
-            version_source = "latest_from_npm"
-        elif ecosystem == "pypi" and name:
-            latest_version = get_latest_pypi_version(name)
-            version_source = "latest_from_pypi"
-        elif ecosystem == "maven" and name:
-            # Maven format: groupId:artifactId
-            if ":" in name:
-                group_id, artifact_id = name.split(":", 1)
-                latest_version = get_latest_maven_version(group_id, artifact_id)
-                version_source = "latest_from_maven"
-            # Also check if we have separate groupId/artifactId fields
-            elif dep.get("groupId") and dep.get("artifactId"):
-                latest_version = get_latest_maven_version(dep["groupId"], dep["artifactId"])
-                version_source = "latest_from_maven"
-        elif ecosystem == "nuget" and name:
-            latest_version = get_latest_nuget_version(name)
-            version_source = "latest_from_nuget"
-        elif ecosystem == "go" and name:
-            # Use full_name if available (includes module path), otherwise use name
-            module_path = dep.get("full_name") or name
-            latest_version = get_latest_go_version(module_path)
-            version_source = "latest_from_goproxy"
-        
-        if latest_version:
-            dep = dep.copy()
+    if client is None:
+        async with _registry_client() as own_client:
+            return await enrich_dependencies_with_latest_versions_async(dependencies, ecosystem, own_client)
+
+    enriched = list(dependencies)
+    # Partition once; deps that already carry a version pass through untouched
+    missing = [(index, dep) for index, dep in enumerate(enriched) if not dep.get("version")]
+    if not missing:
+        return enriched
+    if ecosystem == "maven":
+        await prefetch_latest_maven_versions(client, [
+            coordinates for _, dep in missing if (coordinates := _maven_coordinates(dep)) is not None
+        ])
+    pending = []
+    for index, dep in missing:
+        lookup = _latest_version_lookup(client, dep, ecosystem)
+        if lookup is not None:
+            pending.append((index, lookup[1], lookup[0]))
+    if not pending:
+        return enriched
+
+    results = await asyncio.gather(*(coro for _, _, coro in pending), return_exceptions=True)
+    for (index, version_source, _), latest_version in zip(pending, results):
+        if latest_version and not isinstance(latest_version, BaseException):
+            dep = enriched[index].copy()
             dep["version"] = latest_version
             dep["version_source"] = version_source
-        
-        enriched.append(dep)
-    
+            enriched[index] = dep
     return enriched
 
 
-def analyze_file(filename: str, content: str) -> Dict[str, Any]:
+# Sync callers (the repo scanner's worker threads) share one background loop and
+# one registry client for the process, so keep-alive connections outlive a call
+_sync_loop: asyncio.AbstractEventLoop | None = None
+_sync_client: httpx.AsyncClient | None = None
+_sync_lock = threading.Lock()
+
+
+def _background_loop() -> Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]:
+    global _sync_loop, _sync_client
+    with _sync_lock:
+        if _sync_loop is None or _sync_client is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="registry-loop", daemon=True).start()
+            _sync_loop, _sync_client = loop, _registry_client()
+        return _sync_loop, _sync_client
+
+
+def close_registry_client() -> None:
+    """Close the shared sync-path registry client and stop its loop (app shutdown)."""
+    global _sync_loop, _sync_client
+    with _sync_lock:
+        loop, client = _sync_loop, _sync_client
+        _sync_loop = _sync_client = None
+    if loop is None:
+        return
+    try:
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def _run_blocking(make_coro: Callable[[httpx.AsyncClient], Awaitable[Any]]) -> Any:
+    # Works from any thread, including one running its own loop (which then
+    # waits, as a blocking call does; async callers should use the *_async API)
+    loop, client = _background_loop()
+    return asyncio.run_coroutine_threadsafe(make_coro(client), loop).result()
+
+
+def enrich_dependencies_with_latest_versions(dependencies: List[Dict[str, Any]], ecosystem: str) -> List[Dict[str, Any]]:
+    """Blocking wrapper around enrich_dependencies_with_latest_versions_async for sync callers."""
+    if all(dep.get("version") or not dep.get("name") for dep in dependencies):
+        return list(dependencies)
+    return _run_blocking(partial(enrich_dependencies_with_latest_versions_async, dependencies, ecosystem))
+
+
+_PARSERS = {
+    "npm": lambda content, filename: parse_package_json(content),
+    "pypi": lambda content, filename: parse_requirements(content),
+    "maven": lambda content, filename: parse_maven_pom(content),
+    "nuget": lambda content, filename: parse_requirements(content, filename=filename),
+}
+
+
+# Parsed dependencies keyed by (manager, parser variant, content digest). Registry
+# enrichment is not cached here, so "latest" versions stay fresh on hits.
+_PARSE_CACHE_SIZE = 2048
+_parse_cache: "OrderedDict[Tuple[str, str, bytes], Tuple[Dict[str, Any], ...]]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+_parse_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _parse_variant(manager: str, filename: str) -> str:
+    # Only nuget picks a parser from the filename (see parse_requirements)
+    if manager != "nuget":
+        return ""
+    lowered = filename.lower()
+    if lowered.endswith(".csproj"):
+        return ".csproj"
+    return "packages.config" if "packages.config" in lowered else ""
+
+
+def _parse_cached(manager: str, filename: str, content: str) -> List[Dict[str, Any]]:
+    digest = hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    key = (manager, _parse_variant(manager, filename), digest)
+    with _parse_cache_lock:
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+            _parse_cache_stats["hits"] += 1
+    if cached is None:
+        cached = tuple(_PARSERS[manager](content, filename))
+        with _parse_cache_lock:
+            _parse_cache_stats["misses"] += 1
+            _parse_cache[key] = cached
+            if len(_parse_cache) > _PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+    # Hand out fresh dicts so callers can't mutate cached entries
+    return [dict(dep) for dep in cached]
+
+
+def parse_cache_info() -> Dict[str, int]:
+    with _parse_cache_lock:
+        return {**_parse_cache_stats, "size": len(_parse_cache), "maxsize": _PARSE_CACHE_SIZE}
+
+
+def _parse_file(filename: str, content: str) -> Dict[str, Any]:
     manager = detect_package_manager(filename, content)
-    result = {"packageManager": manager, "dependencies": []}
+    if manager not in _PARSERS:
+        return {"packageManager": manager, "dependencies": [], "ecosystem": "unknown"}
+    return {"packageManager": manager, "dependencies": _parse_cached(manager, filename, content), "ecosystem": manager}
 
-    if manager == "npm":
-        deps = parse_package_json(content)
-        # Enrich with latest versions for packages without version
-        result["dependencies"] = enrich_dependencies_with_latest_versions(deps, "npm")
-        result["ecosystem"] = "npm"
-    elif manager == "pypi":
-        deps = parse_requirements(content)
-        # Enrich with latest versions for packages without version
-        result["dependencies"] = enrich_dependencies_with_latest_versions(deps, "pypi")
-        result["ecosystem"] = "pypi"
-    elif manager == "maven":
-        deps = parse_maven_pom(content)
-        # Enrich with latest versions for packages without version
-        result["dependencies"] = enrich_dependencies_with_latest_versions(deps, "maven")
-        result["ecosystem"] = "maven"
-    elif manager == "nuget":
-        deps = parse_requirements(content, filename=filename)
-        # Enrich with latest versions for packages without version
-        result["dependencies"] = enrich_dependencies_with_latest_versions(deps, "nuget")
-        result["ecosystem"] = "nuget"
-    else:
-        result["ecosystem"] = "unknown"
 
+def analyze_file(filename: str, content: str) -> Dict[str, Any]:
+    result = _parse_file(filename, content)
+    if result["ecosystem"] != "unknown":
+        # Enrich with latest versions for packages without version
+        result["dependencies"] = enrich_dependencies_with_latest_versions(result["dependencies"], result["ecosystem"])
     return result
+
+
+def _enrichment_key(dep: Dict[str, Any]) -> Tuple[Any, ...]:
+    return dep.get("name"), dep.get("full_name"), dep.get("groupId"), dep.get("artifactId")
+
+
+async def analyze_files_async(
+    files: List[Tuple[str, str]],
+    client: httpx.AsyncClient | None = None
+) -> List[Dict[str, Any]]:
+    """Analyze many (filename, content) pairs with a single enrichment pass.
+
+    Files are parsed off the loop, then each distinct unversioned dependency is
+    looked up once per ecosystem however many files reference it. Results keep
+    the input order; a file that fails to parse gets an error report.
+    """
+    if client is None:
+        async with _registry_client() as own_client:
+            return await analyze_files_async(files, own_client)
+
+    parsed = await asyncio.gather(
+        *(asyncio.to_thread(_parse_file, filename, content) for filename, content in files),
+        return_exceptions=True
+    )
+    results: List[Dict[str, Any]] = []
+    unresolved: Dict[str, Dict[Tuple[Any, ...], Dict[str, Any]]] = {}
+    for outcome in parsed:
+        if isinstance(outcome, Exception):
+            results.append({"error": str(outcome), "packageManager": "unknown", "dependencies": []})
+            continue
+        results.append(outcome)
+        if outcome["ecosystem"] == "unknown":
+            continue
+        missing = unresolved.setdefault(outcome["ecosystem"], {})
+        for dep in outcome["dependencies"]:
+            if not dep.get("version") and dep.get("name"):
+                missing.setdefault(_enrichment_key(dep), dep)
+
+    ecosystems = [ecosystem for ecosystem, missing in unresolved.items() if missing]
+    enriched = await asyncio.gather(*(
+        enrich_dependencies_with_latest_versions_async(list(unresolved[ecosystem].values()), ecosystem, client)
+        for ecosystem in ecosystems
+    ))
+    resolved: Dict[Tuple[str, Tuple[Any, ...]], Dict[str, Any]] = {
+        (ecosystem, _enrichment_key(dep)): dep
+        for ecosystem, deps in zip(ecosystems, enriched)
+        for dep in deps
+        if dep.get("version")
+    }
+    if not resolved:
+        return results
+
+    for result in results:
+        ecosystem = result.get("ecosystem")
+        if ecosystem in unresolved:
+            result["dependencies"] = [
+                dep if dep.get("version") else resolved.get((ecosystem, _enrichment_key(dep)), dep).copy()
+                for dep in result["dependencies"]
+            ]
+    return results
+
+
+def analyze_files(files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Blocking wrapper around analyze_files_async for sync callers."""
+    return _run_blocking(partial(analyze_files_async, files))
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
+import logging
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
@@ -9,6 +9,8 @@ import httpx
 
 from ..config import get_settings
 
+logger = logging.getLogger(__name__)
+
 JSONRPC_VERSION = '2.0'
 LATEST_PROTOCOL_VERSION = '2025-06-18'
 
@@ -24,21 +26,29 @@ class MCPHttpClient:
         self._protocol_version: Optional[str] = None
         self._initialized = False
         timeout = httpx.Timeout(30.0, connect=5.0)
-        self._client = httpx.AsyncClient(timeout=timeout)
-        self._lock = asyncio.Lock()
+        # Keep connections warm between tool calls; HTTP/2 is negotiated for https URLs
+        limits = httpx.Limits(max_keepalive_connections=16, max_connections=64, keepalive_expiry=60.0)
+        self._client = httpx.AsyncClient(timeout=timeout, limits=limits, http2=True)
+        # The in-flight handshake, shared by every caller that arrives while it runs
+        self._init_task: Optional[asyncio.Task[None]] = None
 
     async def ensure_initialized(self) -> None:
         if self._initialized:
             return
-        async with self._lock:
-            if self._initialized:
-                return
-            request_id = str(uuid4())
-            params = {
-                'protocolVersion': LATEST_PROTOCOL_VERSION,
-                'capabilities': {},
-                'clientInfo': {'name': 'licenguard-backend', 'version': '0.1.0'}
-            }
+        if self._init_task is None or self._init_task.done():
+            # A finished task here failed (or belongs to a reset session): start over
+            self._init_task = asyncio.ensure_future(self._initialize())
+        # Shielded so one cancelled caller doesn't abort the handshake for the rest
+        await asyncio.shield(self._init_task)
+
+    async def _initialize(self) -> None:
+        request_id = str(uuid4())
+        params = {
+            'protocolVersion': LATEST_PROTOCOL_VERSION,
+            'capabilities': {},
+            'clientInfo': {'name': 'licenguard-backend', 'version': '0.1.0'}
+        }
+        try:
             result = await self._send_request('initialize', params, request_id)
             if not isinstance(result, dict):
                 raise MCPClientError('Invalid initialize response from MCP server')
@@ -46,31 +56,24 @@ class MCPHttpClient:
             if protocol is None:
                 raise MCPClientError('MCP server did not provide protocolVersion')
             self._protocol_version = protocol
-            self._initialized = True
             await self._send_notification('notifications/initialized')
+        except BaseException:
+            self._reset_session()
+            raise
+        # Only now may tool calls go out; waiters resume once this task completes
+        self._initialized = True
 
-    async def discover_library(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        await self.ensure_initialized()
-        try:
-            result = await self._send_request(
-                'tools_call',
-                {'name': 'discover-library-info', 'arguments': payload},
-                str(uuid4())
-            )
-        except MCPClientError as error:
-            # If the server reports it is not initialized, reset state and retry once
-            if 'Server not initialized' in str(error) or 'Failed to contact MCP server' in str(error):
-                self._initialized = False
-                self._session_id = None
-                self._protocol_version = None
-                await self.ensure_initialized()
-                result = await self._send_request(
-                    'tools_call',
-                    {'name': 'discover-library-info', 'arguments': payload},
-                    str(uuid4())
-                )
-            else:
-                raise
+    def _reset_session(self) -> None:
+        self._initialized = False
+        self._init_task = None
+        self._session_id = None
+        self._protocol_version = None
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        return await self._send_request('tools_call', {'name': name, 'arguments': arguments}, str(uuid4()))
+
+    @staticmethod
+    def _discovery_result(result: Any) -> Optional[Dict[str, Any]]:
         if not isinstance(result, dict):
             return None
         structured = result.get('structuredContent') or result.get('data') or result
@@ -82,33 +85,44 @@ class MCPHttpClient:
             return structured
         raise MCPClientError('Unexpected structured content from MCP server')
 
+    @staticmethod
+    def _analysis_result(result: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(result, dict):
+            return None
+        structured = result.get('structuredContent')
+        if isinstance(structured, dict):
+            return structured
+        raise MCPClientError('Unexpected structured content from MCP server')
+
+    async def discover_library(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        await self.ensure_initialized()
+        try:
+            result = await self._call_tool('discover-library-info', payload)
+        except MCPClientError as error:
+            # If the server reports it is not initialized, reset state and retry once
+            if 'Server not initialized' in str(error) or 'Failed to contact MCP server' in str(error):
+                self._reset_session()
+                await self.ensure_initialized()
+                result = await self._call_tool('discover-library-info', payload)
+            else:
+                raise
+        return self._discovery_result(result)
+
     async def analyze_file(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         await self.ensure_initialized()
         try:
-            result = await self._send_request(
-                'tools_call',
-                {'name': 'analyze-file', 'arguments': payload},
-                str(uuid4())
-            )
+            result = await self._call_tool('analyze-file', payload)
         except MCPClientError as error:
             if 'Server not initialized' in str(error):
-                self._initialized = False
-                self._session_id = None
-                self._protocol_version = None
+                self._reset_session()
                 await self.ensure_initialized()
-                result = await self._send_request(
-                    'tools_call',
-                    {'name': 'analyze-file', 'arguments': payload},
-                    str(uuid4())
-                )
+                result = await self._call_tool('analyze-file', payload)
             else:
                 raise
-        if not isinstance(result, dict):
-            return None
-        structured = result.get('structuredContent')
-        if isinstance(structured, dict):
-            return structured
-        raise MCPClientError('Unexpected structured content from MCP server')
+        return self._analysis_result(result)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
     async def _send_notification(self, method: str) -> None:
         message: Dict[str, Any] = {'jsonrpc': JSONRPC_VERSION, 'method': method}
@@ -140,8 +154,7 @@ class MCPHttpClient:
             response = await self._client.post(self.base_url, headers=headers, json=message)
         except httpx.HTTPError as exc:
             raise MCPClientError(f'Failed to contact MCP server: {exc}') from exc
-        log_info = f'{datetime.utcnow().isoformat()} [mcp-client] POST {self.base_url} status {response.status_code}'
-        print(log_info)
+        logger.debug('[mcp-client] POST %s status %s', self.base_url, response.status_code)
         if response.is_error:
             raise MCPClientError(f'MCP server responded with {response.status_code}: {response.text}')
         if not expect_response or response.status_code == 202:
@@ -167,3 +180,10 @@ def get_mcp_http_client() -> Optional[MCPHttpClient]:
         client = MCPHttpClient(settings.mcp_http_url)
         setattr(get_mcp_http_client, '_client', client)
     return client
+
+
+async def close_mcp_http_client() -> None:
+    client: Optional[MCPHttpClient] = getattr(get_mcp_http_client, '_client', None)
+    if client is not None:
+        setattr(get_mcp_http_client, '_client', None)
+        await client.aclose()
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import os
+import posixpath
+from typing import Dict, List, Tuple
+from urllib.parse import quote, urlparse
+
+import httpx
+
+from .repo_scanner import GITHUB_TOKEN_ENV_KEYS, first_env, is_dependency_file, should_ignore_path
+
+logger = logging.getLogger(__name__)
+
+# Manifests are read straight from the provider's API when possible: one recursive
+# tree listing plus a blob request per manifest, instead of a git clone
+_API_TIMEOUT = httpx.Timeout(10.0)
+_BLOB_CONCURRENCY = 8
+
+
+def _github_repo(repo_url: str) -> Tuple[str, str] | None:
+    parsed = urlparse(repo_url)
+    if parsed.scheme not in ("http", "https") or (parsed.hostname or "").lower() not in ("github.com", "www.github.com"):
+        return None
+    parts = [part for part in parsed.path.split("/") if part]
+    if len(parts) < 2:
+        return None
+    owner, repo = parts[0], parts[1]
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return owner, repo
+
+
+def _github_headers() -> Dict[str, str]:
+    headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+    _, token = first_env(*GITHUB_TOKEN_ENV_KEYS)
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+async def fetch_manifests(repo_url: str, commit_sha: str | None = None) -> List[Tuple[str, str]] | None:
+    """
+    Return [(relative_path, content), ...] for the repository's dependency files
+    at `commit_sha` (default: HEAD) without cloning, or None when the URL's provider isn't supported or the API
+    can't serve it (private without a token, truncated tree, rate limit...), in
+    which case callers should fall back to `clone_repository`.
+
+    Only GitHub is supported.
+    """
+    repo = _github_repo(repo_url)
+    if repo is None:
+        return None
+    owner, name = repo
+    base = f"{os.getenv('GITHUB_API_URL') or 'https://api.github.com'}/repos/{quote(owner)}/{quote(name)}"
+
+    async with httpx.AsyncClient(timeout=_API_TIMEOUT, headers=_github_headers(), http2=True) as client:
+        try:
+            response = await client.get(f"{base}/git/trees/{commit_sha or 'HEAD'}", params={"recursive": "1"})
+        except httpx.HTTPError as exc:
+            logger.info(f"[repo-api] tree request failed for {repo_url}: {exc}")
+            return None
+        if response.is_error:
+            logger.info(f"[repo-api] tree request for {repo_url} returned {response.status_code}")
+            return None
+        tree = response.json()
+        if tree.get("truncated"):
+            logger.info(f"[repo-api] tree for {repo_url} is truncated, falling back to clone")
+            return None
+
+        blobs = [
+            (entry["path"], entry["sha"])
+            for entry in tree.get("tree") or []
+            if entry.get("type") == "blob"
+            and is_dependency_file(posixpath.basename(entry["path"]))
+            and not should_ignore_path(entry["path"])
+        ]
+        semaphore = asyncio.Semaphore(_BLOB_CONCURRENCY)
+
+        async def fetch_blob(sha: str) -> str:
+            async with semaphore:
+                blob = await client.get(f"{base}/git/blobs/{sha}", headers={"Accept": "application/vnd.github.raw+json"})
+            blob.raise_for_status()
+            return blob.content.decode("utf-8", errors="ignore")
+
+        try:
+            contents = await asyncio.gather(*(fetch_blob(sha) for _, sha in blobs))
+        except httpx.HTTPError as exc:
+            logger.info(f"[repo-api] blob request failed for {repo_url}: {exc}")
+            return None
+
+    logger.info(f"[repo-api] fetched {len(blobs)} manifests for {repo_url} without cloning")
+    return [(path, content) for (path, _), content in zip(blobs, contents)]
@@ -1,15 +1,47 @@
+import base64
+import hashlib
 import logging
 import os
 import shutil
 import subprocess
 import tempfile
-from typing import List, Dict, Any
-from urllib.parse import urlparse, urlunparse
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from typing import Iterator, List, Dict, Any, Tuple
+from urllib.parse import ParseResult, urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows: clone cache locking is per process only
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Manifest analysis mixes parsing with blocking registry lookups, so a shared
+# thread pool lets one repository's files be analyzed side by side
+_ANALYZE_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+_analyze_pool: ThreadPoolExecutor | None = None
 
-DEP_FILES = {
+
+def _get_analyze_pool() -> ThreadPoolExecutor:
+    global _analyze_pool
+    if _analyze_pool is None:
+        _analyze_pool = ThreadPoolExecutor(max_workers=_ANALYZE_WORKERS, thread_name_prefix='analyze')
+    return _analyze_pool
+
+
+def shutdown_analyze_pool() -> None:
+    global _analyze_pool
+    if _analyze_pool is not None:
+        _analyze_pool.shutdown(wait=False, cancel_futures=True)
+        _analyze_pool = None
+
+
+DEP_FILES = frozenset({
     # JavaScript / Node
     "package.json", "yarn.lock", "pnpm-lock.yaml",
     # Python
@@ -21,15 +53,18 @@ DEP_FILES = {
     ".csproj",
     # Go
     "go.mod", "vendor/modules.txt",
-}
+})
 
 
-def is_dependency_file(filename: str) -> bool:
-    lower = filename.lower()
+_DEP_FILES_LOWER = frozenset(name.lower() for name in DEP_FILES)
+
 
-    if lower.endswith(".csproj"):
+def is_dependency_file(filename: str) -> bool:
+    # Exact names hit without allocating a lowercased copy
+    if filename in DEP_FILES:
         return True
-    return lower in DEP_FILES
+    lower = filename.lower()
+    return lower in _DEP_FILES_LOWER or lower.endswith(".csproj")
 
 
 # Common directories and files to ignore during scanning
@@ -67,145 +102,465 @@ IGNORED_DIRS = {
 }
 
 
-def _should_ignore_path(path: str) -> bool:
+def should_ignore_path(path: str) -> bool:
     """
     Check if a path should be ignored based on common ignore patterns.
     Path can be absolute or relative.
     """
     # Normalize path separators
-    normalized = path.replace("\\", "/")
-    parts = normalized.split("/")
-    
-    # Check if any part matches ignored directories
-    for part in parts:
-        if part in IGNORED_DIRS:
-            return True
-        # Ignore hidden directories (starting with .) except for specific files
-        if part.startswith(".") and part not in [".", ".."]:
-            # Allow .csproj files (they are dependency files, not directories)
-            if part.endswith(".csproj"):
-                continue
-            # Ignore other hidden directories
-            return True
-    
-    return False
+    parts = set(path.replace("\\", "/").split("/"))
+
+    # Check if any part matches ignored directories (one C-level set intersection)
+    if not parts.isdisjoint(IGNORED_DIRS):
+        return True
+    # Ignore hidden directories (starting with .); .csproj files are dependency files, not directories
+    return any(
+        part.startswith(".") and part not in (".", "..") and not part.endswith(".csproj")
+        for part in parts
+    )
+
+
+# Top-level subtrees are walked side by side; directory listing is syscall-bound
+_WALK_WORKERS = 8
+
+
+def _scan_dir(path: str, rel_prefix: str, out: List[str]) -> List[os.DirEntry]:
+    """Append this directory's dependency files to `out` and return the subdirectories to descend."""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        # os.walk silently skips unreadable directories as well
+        return []
+    subdirs = []
+    # is_dependency_file inlined with locals: this loop sees every file in the tree
+    dep_files, dep_files_lower = DEP_FILES, _DEP_FILES_LOWER
+    for entry in entries:
+        name = entry.name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            # Prune ignored and hidden directories; symlinked directories are not descended (os.walk default)
+            if not (name.startswith(".") or name in IGNORED_DIRS or entry.is_symlink()):
+                subdirs.append(entry)
+        elif name in dep_files or (lower := name.lower()) in dep_files_lower or lower.endswith(".csproj"):
+            # No should_ignore_path re-check: every ancestor already passed the
+            # pruning above, and no dependency file name is hidden or ignored itself
+            out.append(rel_prefix + name)
+    return subdirs
+
+
+def _scan_tree(path: str, rel_prefix: str, out: List[str]) -> List[str]:
+    # Same order as os.walk: a directory's files first, then each subdirectory in turn.
+    # An explicit stack instead of recursion, so deeply nested trees can't hit the recursion limit.
+    stack = [(path, rel_prefix)]
+    sep = os.sep
+    while stack:
+        path, rel_prefix = stack.pop()
+        subdirs = _scan_dir(path, rel_prefix, out)
+        stack.extend((entry.path, rel_prefix + entry.name + sep) for entry in reversed(subdirs))
+    return out
 
 
 def find_dependency_files(root: str) -> List[str]:
     """
     Find dependency files in a repository, excluding common build/ignore directories.
+    Clones made by `clone_repository` are sparse, so only manifest files exist on disk.
     """
-    matches = []
-    root_abs = os.path.abspath(root)
-    
-    for dirpath, dirnames, files in os.walk(root):
-        # Prune ignored directories from os.walk
-        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith(".")]
-        
-        # Check if current directory should be ignored
-        rel_dir = os.path.relpath(dirpath, root)
-        if _should_ignore_path(rel_dir):
-            continue
-        
-        for name in files:
-            if is_dependency_file(name):
-                rel = os.path.relpath(os.path.join(dirpath, name), root)
-                # Double-check the full path isn't in an ignored directory
-                if not _should_ignore_path(rel):
-                    matches.append(rel)
-    
+    matches: List[str] = []
+    subdirs = _scan_dir(root, "", matches)
+    if len(subdirs) <= 1:
+        for entry in subdirs:
+            _scan_tree(entry.path, entry.name + os.sep, matches)
+        return matches
+
+    with ThreadPoolExecutor(max_workers=min(_WALK_WORKERS, len(subdirs)), thread_name_prefix='walk') as pool:
+        # map() keeps the sequential walk order
+        for found in pool.map(lambda entry: _scan_tree(entry.path, entry.name + os.sep, []), subdirs):
+            matches.extend(found)
     return matches
 
 
-def _with_host_auth(repo_url: str) -> tuple[str, str | None]:
+# Checked in order; shared with the provider API fetcher
+GITHUB_TOKEN_ENV_KEYS = ("REPO_SCAN_GITHUB_TOKEN", "GITHUB_TOKEN", "GH_TOKEN")
+
+
+@lru_cache(maxsize=None)
+def first_env(*keys: str) -> tuple[str | None, str | None]:
+    """Return (key, value) of the first set env var. Credentials are fixed for the
+    process lifetime (.env is loaded at startup), so lookups are cached."""
+    return next(((key, value) for key in keys if (value := os.environ.get(key))), (None, None))
+
+
+@lru_cache(maxsize=1)
+def _has_ssh() -> bool:
+    return shutil.which("ssh") is not None
+
+
+def _host_auth_env(parsed: ParseResult) -> Dict[str, str]:
     """
-    Insert provider-specific auth into the clone URL if available and applicable.
-    Returns (clone_url, secret_used) so we can redact the secret from errors.
+    Provider-specific credentials for `repo_url` as git config passed through the
+    environment (GIT_CONFIG_COUNT/KEY/VALUE): an Authorization header scoped to
+    the host. Tokens never enter the URL, the command line or .git/config, so
+    error output needs no redaction. Empty when no credentials apply.
     """
-    logger.info(f"Preparing auth for repo URL: {repo_url}")
-    parsed = urlparse(repo_url)
+    logger.info(f"Preparing auth for repo URL: {parsed.geturl()}")
     if parsed.scheme not in ("http", "https") or parsed.username or parsed.password:
-        return repo_url, None
+        return {}
 
     host = (parsed.hostname or "").lower()
     port = f":{parsed.port}" if parsed.port else ""
+    credentials = None
 
     # GitHub personal access token
     if host in ("github.com", "www.github.com"):
-        token = None
-        for key in ("REPO_SCAN_GITHUB_TOKEN", "GITHUB_TOKEN", "GH_TOKEN"):
-            token = os.getenv(key)
-            if token:
-                logger.info(f"Found GitHub token in env var {key}")
-                break
-        if not token:
-            return repo_url, None
-        netloc = f"{token}:x-oauth-basic@{parsed.hostname}{port}"
-        clone_url = urlunparse(parsed._replace(netloc=netloc))
-        return clone_url, token
+        key, token = first_env(*GITHUB_TOKEN_ENV_KEYS)
+        if token:
+            logger.info(f"Found GitHub token in env var {key}")
+            credentials = f"{token}:x-oauth-basic"
 
     # Bitbucket app password (username + app password)
-    if host in ("bitbucket.org", "www.bitbucket.org"):
-        username = None
-        for key in ("REPO_SCAN_BITBUCKET_USER", "BITBUCKET_USER", "BITBUCKET_USERNAME"):
-            username = os.getenv(key)
-            if username:
-                logger.info(f"Found Bitbucket username in env var {key}")
-                break
-
-        app_pw = None
-        for key in ("REPO_SCAN_BITBUCKET_APP_PASSWORD", "BITBUCKET_APP_PASSWORD", "BITBUCKET_TOKEN" ,"BITBUCKET_BASIC_TOKEN"):
-            app_pw = os.getenv(key)
-            if app_pw:
-                logger.info(f"Found Bitbucket app password in env var {key}")
-                break
-        if not username or not app_pw:
-            return repo_url, None
-        netloc = f"{username}:{app_pw}@{parsed.hostname}{port}"
-        clone_url = urlunparse(parsed._replace(netloc=netloc))
-        return clone_url, app_pw
-
-    return repo_url, None
+    elif host in ("bitbucket.org", "www.bitbucket.org"):
+        user_key, username = first_env("REPO_SCAN_BITBUCKET_USER", "BITBUCKET_USER", "BITBUCKET_USERNAME")
+        if username:
+            logger.info(f"Found Bitbucket username in env var {user_key}")
+        pw_key, app_pw = first_env("REPO_SCAN_BITBUCKET_APP_PASSWORD", "BITBUCKET_APP_PASSWORD", "BITBUCKET_TOKEN", "BITBUCKET_BASIC_TOKEN")
+        if app_pw:
+            logger.info(f"Found Bitbucket app password in env var {pw_key}")
+        if username and app_pw:
+            credentials = f"{username}:{app_pw}"
+
+    if credentials is None:
+        return {}
+    basic = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return {
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": f"http.{parsed.scheme}://{parsed.hostname}{port}/.extraheader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+    }
 
 
 # NOTE: `clone_and_scan` removed — use `clone_repository` + `scan_repository` instead.
 
 
-def clone_repository(repo_url: str, target_dir: str | None = None) -> str:
+def _any_case(name: str) -> str:
+    # Sparse patterns are case-sensitive but is_dependency_file is not; a bracket
+    # class per letter keeps e.g. Package.json (core.ignorecase would also change
+    # how the index treats paths that differ only in case)
+    return "".join(f"[{c.lower()}{c.upper()}]" if c.isalpha() else c for c in name)
+
+
+# Clones are blobless and checked out sparsely, so only manifest blobs are ever
+# downloaded. Patterns use gitignore syntax (non-cone mode) and match at any depth.
+_SPARSE_PATTERNS = sorted(
+    "*" + _any_case(name) if name.startswith(".") else ("**/" if "/" in name else "") + _any_case(name)
+    for name in DEP_FILES
+)
+
+
+def _clone_command(url: str, target: str) -> List[str]:
+    # protocol v2 lets the server filter refs; fsmonitor is pointless for a throwaway tree;
+    # index.threads parallelizes the index write at checkout
+    return [
+        "git", "-c", "protocol.version=2", "-c", "core.fsmonitor=false", "-c", "index.threads=true",
+        "clone", "--depth", "1", "--single-branch", "--filter=blob:none", "--no-checkout", url, target,
+    ]
+
+
+def _checkout_manifests(repo_dir: str, env: Dict[str, str]) -> subprocess.CompletedProcess:
+    sparse = subprocess.run(
+        ["git", "-C", repo_dir, "sparse-checkout", "set", "--no-cone", *_SPARSE_PATTERNS],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    if sparse.returncode != 0:
+        # Older git without sparse-checkout: fall back to a full checkout
+        logger.warning(f"sparse-checkout unavailable, checking out full tree: {(sparse.stderr or b'').decode(errors='ignore').strip()}")
+    return subprocess.run(
+        ["git", "-C", repo_dir, "checkout"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+
+
+# Clones are kept per repository URL and refreshed in place with a depth-1 fetch,
+# so rescans download only the new commit (nothing when the remote HEAD is
+# unchanged). The least recently used entries are evicted past the cap.
+_CLONE_CACHE_DIR = os.getenv("REPO_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "licenguard-repos")
+_CLONE_CACHE_MAX_ENTRIES = int(os.getenv("REPO_CACHE_MAX_ENTRIES", "32"))
+_LS_REMOTE_TIMEOUT = 15
+# Used only where fcntl is unavailable; reentrant because a reader may list a
+# checkout it already holds
+_clone_locks: Dict[str, threading.RLock] = {}
+_clone_locks_guard = threading.Lock()
+
+
+def _open_locked_sidecar(path: str, operation: int):
+    """Open and flock `<path>.lock`; None if non-blocking and taken."""
+    lock_path = path + ".lock"
+    while True:
+        fh = open(lock_path, "a")
+        try:
+            fcntl.flock(fh, operation)
+        except BlockingIOError:
+            fh.close()
+            return None
+        except BaseException:
+            fh.close()
+            raise
+        # Eviction unlinks the sidecar while holding it; if that happened while
+        # we waited, our lock is on a dead inode and the new file must be locked
+        try:
+            current = os.stat(lock_path)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(fh.fileno())
+        if current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+            return fh
+        fh.close()
+
+
+@contextmanager
+def _clone_lock(path: str, shared: bool = False, blocking: bool = True) -> Iterator[bool]:
     """
-    Clone the repository and return the path to the cloned repo (root directory).
-    If `target_dir` is not provided a temp dir will be created.
+    Lock one cache entry across threads and worker processes: exclusive for
+    clone/refresh/eviction, shared while a caller reads the checkout. Yields
+    False instead of waiting when `blocking` is off and the entry is taken.
     """
-    tmpdir = target_dir or tempfile.mkdtemp(prefix="repo-scan-")
-    created_tmp = target_dir is None
+    if fcntl is None:
+        with _clone_locks_guard:
+            lock = _clone_locks.setdefault(path, threading.RLock())
+        if not lock.acquire(blocking):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            lock.release()
+        return
+    operation = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+    fh = _open_locked_sidecar(path, operation)
+    if fh is None:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        fh.close()
+
+
+def _cache_entry(root: str) -> str | None:
+    """The cache entry path `root` refers to, or None if it is not a cached clone."""
+    real = os.path.realpath(root)
+    if os.path.dirname(real) != os.path.realpath(_CLONE_CACHE_DIR):
+        return None
+    return os.path.join(_CLONE_CACHE_DIR, os.path.basename(real))
 
+
+def _discard(path: str) -> None:
+    """Free `path` at once and delete its contents; leftovers are evicted later."""
+    if not os.path.lexists(path):
+        return
+    stale = f"{path}.stale-{os.urandom(4).hex()}"
+    try:
+        os.rename(path, stale)
+    except OSError:
+        stale = path
+    shutil.rmtree(stale, ignore_errors=True)
+
+
+def _git_env(home: str) -> Dict[str, str]:
     # Prepare minimal env for non-interactive containers
     env = os.environ.copy()
-    env["HOME"] = tmpdir
+    env["HOME"] = home
     env["GIT_TERMINAL_PROMPT"] = "0"
+    # Abort HTTP transfers stuck below 1 KB/s for 30s instead of holding a worker
+    env["GIT_HTTP_LOW_SPEED_LIMIT"] = "1000"
+    env["GIT_HTTP_LOW_SPEED_TIME"] = "30"
+    return env
+
+
+def _git(repo_dir: str, *args: str, env: Dict[str, str], timeout: float | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["git", "-C", repo_dir, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        timeout=timeout,
+    )
+
+
+def _remote_head(clone_url: str, env: Dict[str, str]) -> str | None:
+    """Resolve the remote HEAD commit without cloning; None if it cannot be determined."""
+    try:
+        result = subprocess.run(
+            ["git", "ls-remote", clone_url, "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            timeout=_LS_REMOTE_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    parts = result.stdout.split() if result.returncode == 0 else []
+    return parts[0].decode() if parts else None
+
+
+def remote_head(repo_url: str) -> str | None:
+    """The commit `repo_url`'s HEAD points at, from a single ls-remote; None if unknown."""
+    return _remote_head(repo_url, {**_git_env(_CLONE_CACHE_DIR), **_host_auth_env(urlparse(repo_url))})
+
+
+def _refresh_clone(path: str, repo_url: str, head: str | None = None) -> bool:
+    """
+    Bring a cached clone up to the remote HEAD; False if it must be re-cloned.
+    `head` is the remote HEAD commit when the caller already resolved it.
+    """
+    env = {**_git_env(path), **_host_auth_env(urlparse(repo_url))}
+    local = _git(path, "rev-parse", "HEAD", env=env)
+    if local.returncode == 0 and local.stdout.strip().decode() == (head or _remote_head(repo_url, env)):
+        return True
+    # set-url also strips credentials older clones had embedded in origin; the
+    # partial-clone filter and sparse patterns are stored in the repo config
+    for args in (("remote", "set-url", "origin", repo_url), ("-c", "fetch.negotiationAlgorithm=noop", "fetch", "--depth", "1", "origin", "HEAD"), ("reset", "--hard", "FETCH_HEAD")):
+        result = _git(path, *args, env=env)
+        if result.returncode != 0:
+            logger.warning(f"Refreshing cached clone of {repo_url} failed at `git {' '.join(args)}`, re-cloning")
+            return False
+    return True
+
+
+def _evict_clone_cache(keep: str) -> None:
+    try:
+        listing = list(os.scandir(_CLONE_CACHE_DIR))
+    except OSError:
+        return
+    entries = [
+        e for e in listing
+        if e.is_dir(follow_symlinks=False) and not e.name.startswith("repo-scan-") and e.path != keep
+        and ".stale-" not in e.name
+    ]
+    # Trees _discard moved aside but couldn't finish deleting; nothing locks them
+    for e in listing:
+        if ".stale-" in e.name and e.is_dir(follow_symlinks=False):
+            shutil.rmtree(e.path, ignore_errors=True)
+    # Sidecars whose entry is gone (evicted elsewhere, or a clone that failed)
+    orphans = [
+        e.path[:-len(".lock")] for e in listing
+        if e.name.endswith(".lock") and not os.path.isdir(e.path[:-len(".lock")])
+    ]
+    for path in orphans:
+        with _clone_lock(path, blocking=False) as locked:
+            if locked and not os.path.isdir(path):
+                _unlink_sidecar(path)
+
+    excess = len(entries) + 1 - _CLONE_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    entries.sort(key=lambda e: e.stat(follow_symlinks=False).st_mtime)
+    for entry in entries:
+        if excess <= 0:
+            break
+        # Entries being cloned, refreshed or read are skipped, never waited on
+        with _clone_lock(entry.path, blocking=False) as locked:
+            if not locked:
+                continue
+            _discard(entry.path)
+            _unlink_sidecar(entry.path)
+        excess -= 1
+
+
+def _unlink_sidecar(path: str) -> None:
+    # Only called with the entry's lock held; waiters notice and relock
+    try:
+        os.unlink(path + ".lock")
+    except OSError:
+        pass
+
+
+def _update_clone(path: str, repo_url: str, head: str | None) -> None:
+    """Refresh the cache entry at `path`, or clone it afresh; caller holds its exclusive lock."""
+    if os.path.isdir(os.path.join(path, ".git")):
+        if _refresh_clone(path, repo_url, head):
+            # Touch so eviction treats the entry as recently used
+            os.utime(path)
+            logger.info(f"Reusing cached clone of {repo_url}")
+            return
+    _discard(path)
+    tmpdir = _clone_into(repo_url, tempfile.mkdtemp(prefix="repo-scan-", dir=_CLONE_CACHE_DIR), created_tmp=True)
+    os.rename(tmpdir, path)
+
+
+@contextmanager
+def checkout_repository(repo_url: str, head: str | None = None) -> Iterator[Tuple[str, str | None]]:
+    """
+    Bring the cached clone of `repo_url` up to the remote HEAD and yield
+    (path, checked-out commit), holding the entry's shared lock for the whole
+    block: other requests may read it at the same time, but refreshes and
+    evictions wait until it exits. Pass the remote HEAD as `head` when already
+    resolved (see `remote_head`) to skip a second ls-remote; the yielded commit
+    can still differ if the branch moved before the fetch.
+    """
+    os.makedirs(_CLONE_CACHE_DIR, exist_ok=True)
+    path = os.path.join(_CLONE_CACHE_DIR, hashlib.sha1(repo_url.encode("utf-8")).hexdigest())
+    for _ in range(3):
+        with _clone_lock(path):
+            _update_clone(path, repo_url, head)
+        # flock can't downgrade atomically, so the entry may be refreshed (fine)
+        # or evicted (clone again) between the two locks
+        with _clone_lock(path, shared=True):
+            if os.path.isdir(os.path.join(path, ".git")):
+                _evict_clone_cache(keep=path)
+                yield path, _tree_head(path)
+                return
+    raise RuntimeError(f"Cached clone of {repo_url} kept being evicted")
 
-    clone_url, secret_used = _with_host_auth(repo_url)
+
+def clone_repository(repo_url: str, target_dir: str | None = None) -> str:
+    """
+    Clone the repository and return the path to the cloned repo (root directory).
+    If `target_dir` is not provided the clone is served from (and kept in) the
+    per-URL cache under REPO_CACHE_DIR, refreshed to the remote HEAD. The entry
+    is not held after this returns; read it through `checkout_repository` or
+    `list_repository_packages`, which lock it.
+    """
+    if target_dir is not None:
+        return _clone_into(repo_url, target_dir, created_tmp=False)
+    with checkout_repository(repo_url) as (path, _):
+        return path
+
+
+def _clone_into(repo_url: str, tmpdir: str, created_tmp: bool) -> str:
+    """Clone into `tmpdir`, falling back to SSH; removes `tmpdir` on failure if we created it."""
+    parsed = urlparse(repo_url)
+    host = (parsed.hostname or "").lower()
+    auth_env = _host_auth_env(parsed)
+    # The auth config is in the environment, so the checkout's lazy blob fetches use it too
+    env = {**_git_env(tmpdir), **auth_env}
     result = subprocess.run(
-        ["git", "clone", "--depth", "1", "--single-branch", "--filter=blob:none", clone_url, tmpdir],
+        _clone_command(repo_url, tmpdir),
         stdout=subprocess.DEVNULL,
         stderr=subprocess.PIPE,
         env=env,
     )
     if result.returncode == 0:
-        return tmpdir
+        result = _checkout_manifests(tmpdir, env)
+        if result.returncode == 0:
+            return tmpdir
 
     stderr = (result.stderr or b"").decode(errors="ignore").strip()
-    if secret_used:
-        stderr = stderr.replace(secret_used, "***redacted***")
 
     logger.warning(f"HTTPS clone failed for {repo_url}: {stderr}")
 
     hint = "Check that the repository URL is correct and reachable."
-    lower_url = repo_url.lower()
-    is_github = "github.com" in lower_url
-    is_bitbucket = "bitbucket.org" in lower_url
+    is_github = host in ("github.com", "www.github.com")
+    is_bitbucket = host in ("bitbucket.org", "www.bitbucket.org")
 
-    if not secret_used:
+    if not auth_env:
         if is_github:
             hint += " For private repos, set GITHUB_TOKEN."
         elif is_bitbucket:
@@ -217,18 +572,10 @@ def clone_repository(repo_url: str, target_dir: str | None = None) -> str:
         hint += " Terminal prompts are disabled. You must provide credentials (env vars) or use SSH with keys."
 
     # Try SSH fallback if appropriate
-    try_ssh_fallback = False
-    has_ssh = shutil.which("ssh") is not None
+    has_ssh = _has_ssh()
     if not has_ssh:
         hint += " SSH client not found, SSH fallback disabled."
-
-    try:
-        parsed = urlparse(repo_url)
-        host = (parsed.hostname or "").lower()
-        if (parsed.scheme in ("http", "https")) and (not secret_used) and host in ("github.com", "www.github.com", "bitbucket.org", "www.bitbucket.org") and has_ssh:
-            try_ssh_fallback = True
-    except Exception:
-        try_ssh_fallback = False
+    try_ssh_fallback = parsed.scheme in ("http", "https") and not auth_env and (is_github or is_bitbucket) and has_ssh
 
     if try_ssh_fallback:
         path = parsed.path.lstrip('/')
@@ -240,13 +587,15 @@ def clone_repository(repo_url: str, target_dir: str | None = None) -> str:
 
         try:
             ssh_result = subprocess.run(
-                ["git", "clone", "--depth", "1", ssh_url, tmpdir],
+                _clone_command(ssh_url, tmpdir),
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 env=ssh_env,
             )
             if ssh_result.returncode == 0:
-                return tmpdir
+                ssh_result = _checkout_manifests(tmpdir, ssh_env)
+                if ssh_result.returncode == 0:
+                    return tmpdir
             ssh_stderr = (ssh_result.stderr or b"").decode(errors="ignore").strip()
             logger.warning(f"SSH fallback failed: {ssh_stderr}")
         except Exception as e:
@@ -276,35 +625,110 @@ def scan_repository(root: str) -> Dict[str, Any]:
     return {"files": files, "root": root}
 
 
+def _read_dependency_file(root: str, rel: str) -> str | Exception:
+    try:
+        # One binary read and a single decode; the parsers don't need newline translation
+        with open(os.path.join(root, rel), 'rb') as fh:
+            return fh.read().decode('utf-8', errors='ignore')
+    except Exception as e:
+        return e
+
+
+# Summaries of a checked-out commit are reused for a while: the same commit yields
+# the same manifests, and only the registry "latest" fill-ins can drift, which the
+# TTL bounds. Keyed by (clone path, HEAD sha); the clone path is per repository URL.
+_SUMMARY_TTL_SECONDS = 600.0
+_SUMMARY_CACHE_SIZE = 256
+_summary_cache: "OrderedDict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_summary_lock = threading.Lock()
+
+
+def _tree_head(root: str) -> str | None:
+    if not os.path.isdir(os.path.join(root, ".git")):
+        return None
+    result = subprocess.run(["git", "-C", root, "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip().decode() or None
+
+
+def _copy_summaries(summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Callers may annotate reports; keep the cached ones pristine
+    return [
+        {"path": item["path"], "report": {**item["report"], "dependencies": [dict(dep) for dep in item["report"].get("dependencies") or []]}}
+        for item in summaries
+    ]
+
+
 def list_repository_packages(root: str) -> List[Dict[str, Any]]:
     """
     Return a list of dependency-file summaries found in a cloned repository.
     Each item is {"path": relative_path, "report": <local analyze_file report>}.
 
     This uses the local file analyzer (no MCP HTTP calls) so it's safe to call
-    in non-networked contexts and suitable for UI previews.
+    in non-networked contexts and suitable for UI previews. Results for a git
+    checkout are cached per HEAD commit.
     """
     if not root or not os.path.isdir(root):
         raise RuntimeError("list_repository_packages: invalid root path")
 
-    summaries: List[Dict[str, Any]] = []
+    entry = _cache_entry(root)
+    if entry is None:
+        return _list_packages(root)
+    # A cached clone is shared; hold it so a concurrent refresh or eviction
+    # can't change or remove the tree mid-walk
+    with _clone_lock(entry, shared=True):
+        if not os.path.isdir(root):
+            raise RuntimeError("list_repository_packages: cached clone was evicted, clone again")
+        return _list_packages(root)
+
+
+def _list_packages(root: str) -> List[Dict[str, Any]]:
+    head = _tree_head(root)
+    key = (os.path.realpath(root), head) if head else None
+    if key is not None:
+        with _summary_lock:
+            hit = _summary_cache.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                _summary_cache.move_to_end(key)
+                return _copy_summaries(hit[1])
+
+    summaries = _summarize_repository(root)
+    if key is not None and not any("error" in item["report"] for item in summaries):
+        with _summary_lock:
+            _summary_cache[key] = (time.monotonic() + _SUMMARY_TTL_SECONDS, _copy_summaries(summaries))
+            _summary_cache.move_to_end(key)
+            if len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+                _summary_cache.popitem(last=False)
+    return summaries
+
+
+def _summarize_repository(root: str) -> List[Dict[str, Any]]:
     try:
         # Import locally to avoid circular imports at module import time
-        from .file_analyzer import analyze_file as local_analyze_file
+        from .file_analyzer import analyze_files as local_analyze_files
     except Exception:
-        local_analyze_file = None
+        local_analyze_files = None
 
-    for rel in find_dependency_files(root):
-        full = os.path.join(root, rel)
+    files = find_dependency_files(root)
+    read = partial(_read_dependency_file, root)
+    # map() keeps the find_dependency_files order
+    contents = [read(rel) for rel in files] if len(files) <= 1 else list(_get_analyze_pool().map(read, files))
+
+    reports: Dict[str, Dict[str, Any]] = {}
+    readable = []
+    for rel, content in zip(files, contents):
+        if isinstance(content, Exception):
+            reports[rel] = {"error": str(content), "packageManager": "unknown", "dependencies": []}
+        elif local_analyze_files is None:
+            reports[rel] = {"packageManager": "unknown", "dependencies": []}
+        else:
+            readable.append((rel, content))
+    if readable:
+        # One pipeline for the whole repo, so shared dependencies are looked up once
         try:
-            with open(full, 'r', encoding='utf-8', errors='ignore') as fh:
-                content = fh.read()
-            if local_analyze_file:
-                report = local_analyze_file(rel, content)
-            else:
-                report = {"packageManager": "unknown", "dependencies": []}
+            analyzed = local_analyze_files(readable)
         except Exception as e:
-            report = {"error": str(e), "packageManager": "unknown", "dependencies": []}
-        summaries.append({"path": rel, "report": report})
-
-    return summaries
+            analyzed = [{"error": str(e), "packageManager": "unknown", "dependencies": []} for _ in readable]
+        reports.update(zip((rel for rel, _ in readable), analyzed))
+    return [{"path": rel, "report": reports[rel]} for rel in files]
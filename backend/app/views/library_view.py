@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Query, UploadFile, File, HTTPException
+from fastapi import APIRouter, Query, Request, Response, UploadFile, File, HTTPException
+import asyncio
+from collections import defaultdict
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from functools import lru_cache
+import hashlib
+import logging
 import os
-import shutil
-from typing import Any, Dict, List, Optional
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from ..controllers.library_controller import (
     add_version,
     create_library,
     get_library,
     list_libraries,
     search_libraries,
+    search_libraries_bulk,
     search_libraries_local,
+    search_cache as _search_cache,
     update_library
 )
-from ..controllers.repository_scan_controller import create_repository_scan
+from ..controllers.repository_scan_controller import cache_scan_result, create_repository_scan, get_cached_scan_result
 from ..models.library import (
+    LIBRARY_LIST_ADAPTER,
     LibraryCreate,
     LibraryDocument,
     LibrarySearchResponse,
@@ -20,17 +31,55 @@ from ..models.library import (
     VersionModel
 )
 from ..models.repository_scan import RepositoryScanCreate
+from ..services.file_analyzer import analyze_files_async
 from ..services.mcp_client import get_mcp_http_client, MCPClientError
+from ..services.repo_api_fetcher import fetch_manifests
 from ..services.repo_scanner import (
-    clone_repository,
+    checkout_repository,
     scan_repository,
     list_repository_packages,
+    remote_head,
 )
 from urllib.parse import urlparse
 
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/libraries', tags=['libraries'])
 
+# Upper bound on dependencies resolved at once during a repository scan
+RESOLVE_CONCURRENCY = 8
+# Largest manifest accepted by /analyze/file
+MAX_ANALYZE_BYTES = 10 * 1024 * 1024
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Search responses are cached (see library_controller.search_cache): popular names
+# are searched over and over, and results only change when libraries are written.
+# Entries expire after the TTL (the same max-age clients get), which is also the
+# only invalidation writes made by other worker processes get.
+SEARCH_CACHE_TTL_SECONDS = 60
+_SEARCH_CACHE_MAX_ENTRIES = 1024
+
+# Risk fields copied onto each resolved dependency, in response order
+_RISK_KEYS = (
+    'risk_score',
+    'risk_level',
+    'risk_score_explanation',
+    'license_risk_score',
+    'security_risk_score',
+    'maintenance_risk_score',
+    'usage_context_risk_score',
+)
+
+# License tiers by precedence: (level, base score, reason, keywords, emoji markers)
+_LICENSE_TIERS = (
+    ('high', 90, 'strong copyleft indicators (e.g., GPL/AGPL/SSPL)', ('agpl', 'gpl', 'sspl', 'copyleft'), frozenset('🔴🚫')),
+    ('medium', 60, 'weak/limited copyleft indicators (e.g., LGPL/MPL)', ('lgpl', 'mpl', 'cddl'), frozenset('🟠🟡')),
+    ('low', 10, 'permissive license indicators (e.g., MIT/Apache/BSD)', ('mit', 'apache', 'bsd', 'isc'), frozenset('🟢✅')),
+)
+_UNKNOWN_TIER = len(_LICENSE_TIERS)
+_LICENSE_KEYWORD_RANKS = {keyword: rank for rank, tier in enumerate(_LICENSE_TIERS) for keyword in tier[3]}
+_LICENSE_KEYWORD_RE = re.compile(f"(?=({'|'.join(_LICENSE_KEYWORD_RANKS)}))")
+
 
 def normalize_version(ver):
     return (ver or '').lstrip('^').lstrip('v').strip()
@@ -48,40 +97,32 @@ def compute_risk_from_license(license_name=None, license_summary=None, confidenc
                 emoji_parts.append(item['emoji'])
         else:
             text_parts.append(str(item))
-    haystack = ' '.join([license_name or '', *text_parts]).lower()
-    has_strong = 'agpl' in haystack or 'gpl' in haystack or 'sspl' in haystack or 'copyleft' in haystack or any(
-        '🔴' in e or '🚫' in e for e in emoji_parts
-    )
-    has_weak = 'lgpl' in haystack or 'mpl' in haystack or 'cddl' in haystack or any(
-        '🟠' in e or '🟡' in e for e in emoji_parts
-    )
-    has_perm = 'mit' in haystack or 'apache' in haystack or 'bsd' in haystack or 'isc' in haystack or any(
-        '🟢' in e or '✅' in e for e in emoji_parts
-    )
-    level = 'unknown'
-    base = 50
-    if has_strong:
-        level = 'high'
-        base = 90
-    elif has_weak:
-        level = 'medium'
-        base = 60
-    elif has_perm:
-        level = 'low'
-        base = 10
     conf = confidence if isinstance(confidence, (int, float)) else 1
+    # Scans repeat the same handful of licenses; classify each distinct input once
+    return dict(_compute_risk_cached(license_name or '', tuple(text_parts), tuple(emoji_parts), conf))
+
+
+@lru_cache(maxsize=4096)
+def _compute_risk_cached(license_name: str, text_parts: tuple, emoji_parts: tuple, conf: float) -> Dict[str, Any]:
+    # Emoji markers are a cheap set test; only scan the text when they don't
+    # already settle the top tier
+    emoji = set(''.join(emoji_parts))
+    rank = next((i for i, tier in enumerate(_LICENSE_TIERS) if not emoji.isdisjoint(tier[4])), _UNKNOWN_TIER)
+    if rank:
+        # One pass over the text; the lookahead reports overlapping hits so e.g.
+        # "lgpl" still counts as "gpl" too, exactly like plain substring checks
+        haystack = ' '.join([license_name, *text_parts]).lower()
+        for m in _LICENSE_KEYWORD_RE.finditer(haystack):
+            rank = min(rank, _LICENSE_KEYWORD_RANKS[m.group(1)])
+            if not rank:
+                break
+    level, base, reason = _LICENSE_TIERS[rank][:3] if rank < _UNKNOWN_TIER else ('unknown', 50, 'based on detected license hints')
     score = min(100, max(0, round(base * conf)))
-    reason = 'based on detected license hints'
-    if has_strong:
-        reason = 'strong copyleft indicators (e.g., GPL/AGPL/SSPL)'
-    elif has_weak:
-        reason = 'weak/limited copyleft indicators (e.g., LGPL/MPL)'
-    elif has_perm:
-        reason = 'permissive license indicators (e.g., MIT/Apache/BSD)'
     explanation = f"{level} risk — score {score}/100 {reason}"
     return {'level': level, 'score': score, 'explanation': explanation}
 
 
+@lru_cache(maxsize=1024)
 def _infer_repo_meta(repo_url: str) -> tuple[str, str]:
     parsed = urlparse(repo_url)
     platform = (parsed.hostname or '').split('.')[-2] if parsed.hostname else 'unknown'
@@ -100,20 +141,22 @@ def pick_version_match(versions, target):
     return versions[0]
 
 
-async def resolve_dependency_entry(dep: Dict[str, Any], relpath: str, report: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Look up dependency in Mongo first; if missing, fall back to MCP search and persist the result.
-    Returns an enriched dependency dict with risk data and sources.
-    """
-    name = dep.get('name')
-    if not name:
-        return {**dep, "sources": [relpath]}
+def pick_document_version(doc: LibraryDocument, target):
+    """`pick_version_match` over a document's versions through an index built once per document."""
+    if not doc.versions:
+        return None
+    index = doc._version_index
+    if index is None:
+        index = {}
+        for ver in doc.versions:
+            index.setdefault(normalize_version(ver.version).lower(), ver)
+        doc._version_index = index
+    return (index.get(target.lower()) if target else None) or doc.versions[0]
 
-    version_raw = dep.get('version')
-    version_norm = normalize_version(version_raw)
-    ecosystem = dep.get('ecosystem') or report.get('ecosystem') or report.get('packageManager') or 'unknown'
-    query = f"{name} {version_norm}" if version_norm else name
 
+async def _lookup_library(name: str, version_norm: str, ecosystem: str) -> Optional[LibraryDocument]:
+    """Search Mongo, then MCP, for a dependency; MCP discoveries are persisted."""
+    query = f"{name} {version_norm}" if version_norm else name
     search_res = await search_libraries(query)
     match_doc: Optional[LibraryDocument] = None
 
@@ -178,57 +221,78 @@ async def resolve_dependency_entry(dep: Dict[str, Any], relpath: str, report: Di
         try:
             match_doc = await create_library(payload)
         except Exception:
-            from datetime import datetime
-            fallback = payload.model_dump()
-            fallback['created_at'] = datetime.utcnow()
-            fallback['updated_at'] = datetime.utcnow()
-            match_doc = LibraryDocument(**fallback)  # type: ignore
-
-    risk_score = dep.get('risk_score')
-    risk_level = dep.get('risk_level')
-    risk_explanation = dep.get('risk_score_explanation')
-    license_risk_score = dep.get('license_risk_score')
-    security_risk_score = dep.get('security_risk_score')
-    maintenance_risk_score = dep.get('maintenance_risk_score')
-    usage_context_risk_score = dep.get('usage_context_risk_score')
+            # The payload is already validated; reuse its models instead of re-validating a dump
+            now = datetime.now(timezone.utc)
+            match_doc = LibraryDocument.model_construct(**dict(payload), created_at=now, updated_at=now)
+    return match_doc
+
+
+async def resolve_dependency_entry(
+    dep: Dict[str, Any],
+    relpath: str,
+    report: Dict[str, Any],
+    cached_doc: Optional[LibraryDocument] = None,
+    cache: Optional[Dict[Tuple[str, str, str], 'asyncio.Future[Optional[LibraryDocument]]']] = None
+) -> Dict[str, Any]:
+    """
+    Look up dependency in Mongo first; if missing, fall back to MCP search and persist the result.
+    `cached_doc` is a library already fetched by exact name (see `search_libraries_bulk`);
+    when it carries the requested version the search is skipped. `cache` is a per-scan
+    map of in-flight lookups keyed by (name, ecosystem, version).
+    Returns an enriched dependency dict with risk data and sources.
+    """
+    name = dep.get('name')
+    if not name:
+        return {**dep, "sources": [relpath]}
+
+    version_raw = dep.get('version')
+    version_norm = normalize_version(version_raw)
+    ecosystem = dep.get('ecosystem') or report.get('ecosystem') or report.get('packageManager') or 'unknown'
+
+    if cached_doc is not None and (not version_norm or any(
+        normalize_version(v.version).lower() == version_norm.lower() for v in cached_doc.versions or []
+    )):
+        match_doc: Optional[LibraryDocument] = cached_doc
+    elif cache is None:
+        match_doc = await _lookup_library(name, version_norm, ecosystem)
+    else:
+        # Concurrent occurrences of the same dependency share one lookup
+        lookup_key = (name.lower(), ecosystem, version_norm.lower())
+        lookup = cache.get(lookup_key)
+        if lookup is None:
+            lookup = cache[lookup_key] = asyncio.ensure_future(_lookup_library(name, version_norm, ecosystem))
+        match_doc = await lookup
+
+    scores = {key: dep.get(key) for key in _RISK_KEYS}
     library_id = None
     repository_url = None
 
     if match_doc:
         library_id = str(getattr(match_doc, 'id', None) or getattr(match_doc, '_id', None) or '') or None
         repository_url = getattr(match_doc, 'repository_url', None)
-        version_match = pick_version_match(getattr(match_doc, 'versions', None) or [], version_norm)
+        version_match = pick_document_version(match_doc, version_norm)
         if version_match:
-            risk_score = risk_score or getattr(version_match, 'risk_score', None) or (version_match.get('risk_score') if isinstance(version_match, dict) else None)
-            risk_level = risk_level or getattr(version_match, 'risk_level', None) or (version_match.get('risk_level') if isinstance(version_match, dict) else None)
-            risk_explanation = risk_explanation or getattr(version_match, 'risk_score_explanation', None) or (version_match.get('risk_score_explanation') if isinstance(version_match, dict) else None)
-            license_risk_score = license_risk_score or getattr(version_match, 'license_risk_score', None) or (version_match.get('license_risk_score') if isinstance(version_match, dict) else None)
-            security_risk_score = security_risk_score or getattr(version_match, 'security_risk_score', None) or (version_match.get('security_risk_score') if isinstance(version_match, dict) else None)
-            maintenance_risk_score = maintenance_risk_score or getattr(version_match, 'maintenance_risk_score', None) or (version_match.get('maintenance_risk_score') if isinstance(version_match, dict) else None)
-            usage_context_risk_score = usage_context_risk_score or getattr(version_match, 'usage_context_risk_score', None) or (version_match.get('usage_context_risk_score') if isinstance(version_match, dict) else None)
-            license_summary = getattr(version_match, 'license_summary', None) if not isinstance(version_match, dict) else version_match.get('license_summary')
-            license_name = getattr(version_match, 'license_name', None) if not isinstance(version_match, dict) else version_match.get('license_name')
-            confidence = getattr(version_match, 'confidence', None) if not isinstance(version_match, dict) else version_match.get('confidence')
-            if risk_score is None or risk_level is None:
+            # Read dicts and models alike; vars() exposes model fields without copying
+            vm = version_match if isinstance(version_match, dict) else vars(version_match)
+            for key in _RISK_KEYS:
+                scores[key] = scores[key] or vm.get(key)
+            license_summary = vm.get('license_summary')
+            license_name = vm.get('license_name')
+            confidence = vm.get('confidence')
+            if scores['risk_score'] is None or scores['risk_level'] is None:
                 computed = compute_risk_from_license(license_name, license_summary, confidence)
-                risk_score = risk_score or computed['score']
-                risk_level = risk_level or computed['level']
-                risk_explanation = risk_explanation or computed.get('explanation')
-            elif not risk_explanation and (license_name or license_summary):
+                scores['risk_score'] = scores['risk_score'] or computed['score']
+                scores['risk_level'] = scores['risk_level'] or computed['level']
+                scores['risk_score_explanation'] = scores['risk_score_explanation'] or computed.get('explanation')
+            elif not scores['risk_score_explanation'] and (license_name or license_summary):
                 computed = compute_risk_from_license(license_name, license_summary, confidence)
-                risk_explanation = computed.get('explanation')
+                scores['risk_score_explanation'] = computed.get('explanation')
 
     enriched = {
         "name": name,
         "version": version_raw,
         "ecosystem": ecosystem,
-        "risk_score": risk_score,
-        "risk_level": risk_level,
-        "risk_score_explanation": risk_explanation,
-        "license_risk_score": license_risk_score,
-        "security_risk_score": security_risk_score,
-        "maintenance_risk_score": maintenance_risk_score,
-        "usage_context_risk_score": usage_context_risk_score,
+        **scores,
         "sources": [relpath],
         "library_id": library_id,
         "repository_url": repository_url
@@ -237,18 +301,52 @@ async def resolve_dependency_entry(dep: Dict[str, Any], relpath: str, report: Di
 
 
 @router.get('/', response_model=List[LibraryDocument])
-async def handle_list_libraries(limit: int = Query(50, ge=1, le=500, description='Max items to return')):
-    return await list_libraries(limit)
+async def handle_list_libraries(
+    limit: int = Query(50, ge=1, le=500, description='Max items to return'),
+    summary: bool = Query(False, description='Return version strings only, without license/risk details')
+):
+    docs = await list_libraries(limit, summary)
+    # Already validated by the controller: serialize once and skip FastAPI's re-validation
+    return Response(LIBRARY_LIST_ADAPTER.dump_json(docs, by_alias=True), media_type='application/json')
+
+
+async def _cached_search(
+    request: Request,
+    kind: str,
+    q: str,
+    search: Callable[[str], Awaitable[LibrarySearchResponse]]
+) -> Response:
+    key = (kind, q)
+    now = time.monotonic()
+    entry = _search_cache.get(key)
+    if entry is not None and entry[0] > now:
+        _search_cache.move_to_end(key)
+    else:
+        resp = await search(q)
+        body = resp.model_dump_json(by_alias=True).encode()
+        entry = (now + SEARCH_CACHE_TTL_SECONDS, body, f'"{hashlib.sha1(body).hexdigest()}"')
+        # Empty answers may be a transient MCP failure; don't pin them
+        if resp.results or resp.discovery:
+            _search_cache[key] = entry
+            _search_cache.move_to_end(key)
+            while len(_search_cache) > _SEARCH_CACHE_MAX_ENTRIES:
+                _search_cache.popitem(last=False)
+    _, body, etag = entry
+    headers = {'ETag': etag, 'Cache-Control': f'max-age={SEARCH_CACHE_TTL_SECONDS}'}
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in (t.strip().removeprefix('W/') for t in if_none_match.split(','))):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
 
 
 @router.get('/search', response_model=LibrarySearchResponse)
-async def handle_search_libraries(q: str = Query(..., min_length=1, description='Library name or keyword')):
-    return await search_libraries(q)
+async def handle_search_libraries(request: Request, q: str = Query(..., min_length=1, description='Library name or keyword')):
+    return await _cached_search(request, 'search', q, search_libraries)
 
 
 @router.get('/search/local', response_model=LibrarySearchResponse)
-async def handle_search_libraries_local(q: str = Query(..., min_length=1, description='Library name or keyword')):
-    return await search_libraries_local(q)
+async def handle_search_libraries_local(request: Request, q: str = Query(..., min_length=1, description='Library name or keyword')):
+    return await _cached_search(request, 'local', q, search_libraries_local)
 
 
 @router.post('/', response_model=LibraryDocument, status_code=201)
@@ -276,7 +374,15 @@ async def handle_analyze_file(file: UploadFile = File(...)):
     client = get_mcp_http_client()
     if not client:
         raise HTTPException(status_code=503, detail='MCP HTTP client not configured')
-    content = (await file.read()).decode('utf-8', errors='ignore')
+    if file.size is not None and file.size > MAX_ANALYZE_BYTES:
+        raise HTTPException(status_code=413, detail='File too large to analyze')
+    # Read in chunks so an oversized upload is rejected before it is buffered whole
+    data = bytearray()
+    while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+        data += chunk
+        if len(data) > MAX_ANALYZE_BYTES:
+            raise HTTPException(status_code=413, detail='File too large to analyze')
+    content = data.decode('utf-8', errors='ignore')
     try:
         report = await client.analyze_file({"filename": file.filename, "content": content})
     except MCPClientError as error:
@@ -285,6 +391,21 @@ async def handle_analyze_file(file: UploadFile = File(...)):
 
 
 
+def _checkout_and_list(repo_url: str, head: Optional[str] = None) -> Tuple[str, Optional[str], List[Dict[str, Any]]]:
+    """Clone/refresh the cached checkout and list its packages while holding it,
+    so concurrent refreshes or evictions of the shared entry can't pull it away.
+    Returns (root, checked-out commit, summaries)."""
+    with ExitStack() as stack:
+        try:
+            root, commit = stack.enter_context(checkout_repository(repo_url, head))
+        except Exception as error:
+            raise HTTPException(status_code=502, detail=f'Repo clone failed: {error}')
+        try:
+            return root, commit, list_repository_packages(root)
+        except Exception as error:
+            raise HTTPException(status_code=500, detail=f'Failed to list repository packages: {error}')
+
+
 @router.post('/repositories/clone')
 async def handle_repo_clone(payload: dict):
     """Clone a repository and return a preview list of dependency files and parsed packages.
@@ -299,17 +420,8 @@ async def handle_repo_clone(payload: dict):
     # ensure static type checkers see a plain str
     repo_url = str(repo_url)
 
-    try:
-        root = clone_repository(repo_url)
-    except Exception as error:
-        raise HTTPException(status_code=502, detail=f'Repo clone failed: {error}')
-
-    try:
-        summaries = list_repository_packages(root)
-    except Exception as error:
-        # cleanup cloned repo on failure
-        shutil.rmtree(root, ignore_errors=True)
-        raise HTTPException(status_code=500, detail=f'Failed to list repository packages: {error}')
+    # git and the manifest analysis block; run them off the event loop
+    root, _, summaries = await asyncio.to_thread(_checkout_and_list, repo_url)
 
     # Note: we keep the cloned repo on disk for now so the UI can request a follow-up scan if needed.
     return {"url": repo_url, "root": root, "files": summaries}
@@ -330,25 +442,32 @@ async def handle_repo_list_packages(payload: dict):
 
     try:
         if root:
-            summaries = list_repository_packages(root)
+            summaries = await asyncio.to_thread(list_repository_packages, root)
             return {"root": root, "files": summaries}
         # else clone then list
         elif repo_url:
             if not isinstance(repo_url, str):
                 raise HTTPException(status_code=400, detail='url must be a string')
-            root = clone_repository(str(repo_url))
-            summaries = list_repository_packages(root)
+            root, _, summaries = await asyncio.to_thread(_checkout_and_list, str(repo_url))
             return {"url": repo_url, "root": root, "files": summaries}
+    except HTTPException:
+        raise
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
 
 @router.post('/repositories/scan/highest-risk')
-async def handle_repo_scan_highest_risk(payload: dict):
+async def handle_repo_scan_highest_risk(
+    payload: dict,
+    refresh: bool = Query(False, description='Rescan even if this commit was scanned recently')
+):
     """
     Scan a repository (same flow as /repositories/scan) and return the libraries
     with the highest risk score across all discovered dependencies. Intended for
     CI/CD pipelines to gate on risk_score.
+
+    Responses are reused for the same remote HEAD commit (see SCAN_RESULT_TTL_SECONDS)
+    unless `refresh` is set.
     """
     repo_url = payload.get('url')
     if not repo_url:
@@ -361,23 +480,29 @@ async def handle_repo_scan_highest_risk(payload: dict):
     if not client:
         raise HTTPException(status_code=503, detail='MCP HTTP client not configured')
 
-    # Use existing route handlers to support both UI and CI flows:
-    #  - clone the repository (handle_repo_clone)
-    #  - list packages for the cloned repo (handle_repo_list_packages)
-    # Then enrich each dependency using `resolve_dependency_entry`.
-    try:
-        clone_res = await handle_repo_clone({"url": repo_url})
-        # clone_res should contain `root` and `files`
-        root = clone_res.get("root")
-        scanned_files = clone_res.get("files") or []
+    # CI polls the same commit repeatedly; one ls-remote tells whether it was already scanned
+    commit_sha = await asyncio.to_thread(remote_head, repo_url)
+    if commit_sha and not refresh:
+        cached = await get_cached_scan_result(repo_url, commit_sha)
+        if cached is not None:
+            return cached
 
-        # If clone returned no files, try listing packages explicitly
-        if not scanned_files and root:
-            list_res = await handle_repo_list_packages({"root": root})
-            scanned_files = list_res.get("files") or []
+    # Read the manifests through the provider API when possible; otherwise clone
+    # the repository and list its packages, then enrich each dependency using
+    # `resolve_dependency_entry`.
+    try:
+        # Read the tree at the commit checked above so the result is stored
+        # under the commit it describes, even if the branch moves meanwhile
+        manifests = await fetch_manifests(repo_url, commit_sha)
+        if manifests is not None:
+            reports = await analyze_files_async(manifests)
+            scanned_files = [{"path": path, "report": report} for (path, _), report in zip(manifests, reports)]
+        else:
+            # Cache under the commit actually checked out, in case it moved past commit_sha
+            _, commit_sha, scanned_files = await asyncio.to_thread(_checkout_and_list, repo_url, commit_sha)
 
-        dependencies = []
         analyzed_files = []
+        pending = []
 
         for f in scanned_files:
             relpath = f.get("path")
@@ -385,85 +510,116 @@ async def handle_repo_scan_highest_risk(payload: dict):
             # collect analyzed file summary
             analyzed_files.append({"path": relpath, "report": report})
 
-            deps = Array = report.get("dependencies") if isinstance(report.get("dependencies"), list) else []
-            for dep in deps:
-                try:
-                    enriched = await resolve_dependency_entry(dep, relpath, report)
-                except Exception:
-                    # fallback: still include minimal dep info
-                    enriched = {
-                        "name": dep.get("name"),
-                        "version": dep.get("version"),
-                        "ecosystem": dep.get("ecosystem") or report.get("ecosystem"),
-                        "sources": [relpath]
-                    }
-                # attach source file info
-                enriched["file"] = relpath
-                dependencies.append(enriched)
+            deps = report.get("dependencies")
+            if not isinstance(deps, list):
+                deps = []
+            pending.extend((dep, relpath, report) for dep in deps)
+
+        # Fetch every already-known library in one query; only the rest go
+        # through the per-dependency search (and MCP discovery)
+        try:
+            named = [dep for dep, _, _ in pending if dep.get("name")]
+            known = await search_libraries_bulk(
+                [dep["name"] for dep in named],
+                [normalize_version(dep.get("version")) for dep in named]
+            )
+        except Exception:
+            known = {}
+
+        # Resolve dependencies side by side; the semaphore bounds load on Mongo/MCP
+        semaphore = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+        lookups: Dict[Tuple[str, str, str], 'asyncio.Future[Optional[LibraryDocument]]'] = {}
+
+        async def resolve(dep: Dict[str, Any], relpath: str, report: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                cached_doc = known.get(dep["name"].lower()) if dep.get("name") else None
+                async with semaphore:
+                    enriched = await resolve_dependency_entry(dep, relpath, report, cached_doc, lookups)
+            except Exception:
+                # fallback: still include minimal dep info
+                enriched = {
+                    "name": dep.get("name"),
+                    "version": dep.get("version"),
+                    "ecosystem": dep.get("ecosystem") or report.get("ecosystem"),
+                    "sources": [relpath]
+                }
+            # attach source file info
+            enriched["file"] = relpath
+            return enriched
+
+        dependencies = list(await asyncio.gather(*(resolve(*item) for item in pending)))
     except HTTPException:
         # propagate HTTP errors as-is
         raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
+    # One pass over the enriched dependencies: group them by source file
+    # (library_path) for persistence and track every one tied for the top score
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    global_top_score = None
+    top: List[Dict[str, Any]] = []
+    for d in dependencies:
+        score = d.get('risk_score')
+        if score is not None:
+            if global_top_score is None or score > global_top_score:
+                global_top_score = score
+                top = [d]
+            elif score == global_top_score:
+                top.append(d)
+        name = d.get('name')
+        if not name:
+            continue
+        version = d.get('version')
+        sources = d.get('sources')
+        # prefer explicit file field, fall back to first source if present
+        path = d.get('file') or (sources[0] if sources else None) or 'unknown'
+        grouped[path].append({
+            "library_name": name,
+            "library_version": (normalize_version(version) or version) if version else "unknown",
+            "ecosystem": d.get('ecosystem') or 'unknown'
+        })
+
     # Persist summarized scan to repository_scans collection
     platform, repo_name = _infer_repo_meta(repo_url)
     try:
-        # Group enriched dependencies by their source file path (library_path)
-        grouped: Dict[str, List[Dict[str, Any]]] = {}
-        for d in dependencies:
-            # prefer explicit file field, fall back to first source if present
-            path = d.get('file') or (d.get('sources')[0] if d.get('sources') else None) or 'unknown'
-            if not d.get('name'):
-                continue
-            lib_entry = {
-                "library_name": d.get('name'),
-                "library_version": normalize_version(d.get('version')) or d.get('version') or "unknown",
-                "ecosystem": d.get('ecosystem') or 'unknown'
-            }
-            grouped.setdefault(path, []).append(lib_entry)
-
-        deps_payload = [
-            {"library_path": path, "libraries": libs}
-            for path, libs in grouped.items()
-        ]
-
         payload = RepositoryScanCreate(
             repository_url=repo_url,
             repository_platform=platform,
             repository_name=repo_name,
-            dependencies=deps_payload,
+            dependencies=[{"library_path": path, "libraries": libs} for path, libs in grouped.items()],
         )
         await create_repository_scan(payload)
     except Exception as exc:
-        print(f'{datetime.utcnow().isoformat()} [repo_scan_highest] failed to persist scan: {exc}')
-
-    deps_with_scores = [d for d in dependencies if d.get('risk_score') is not None]
-    if deps_with_scores:
-        global_top_score = max(d['risk_score'] for d in deps_with_scores if d.get('risk_score') is not None)
-        highest = [
-            {
-                "name": d.get('name'),
-                "version": d.get('version'),
-                "ecosystem": d.get('ecosystem'),
-                "risk_score": d.get('risk_score'),
-                "risk_level": d.get('risk_level'),
-                "risk_score_explanation": d.get('risk_score_explanation'),
-                "library_id": d.get('library_id'),
-                "repository_url": d.get('repository_url'),
-                "sources": d.get('sources', [])
-            }
-            for d in deps_with_scores
-            if d.get('risk_score') == global_top_score
-        ]
-    else:
-        global_top_score = None
-        highest = []
-
-    return {
+        logger.warning('[repo_scan_highest] failed to persist scan: %s', exc)
+
+    highest = [
+        {
+            "name": d.get('name'),
+            "version": d.get('version'),
+            "ecosystem": d.get('ecosystem'),
+            "risk_score": d.get('risk_score'),
+            "risk_level": d.get('risk_level'),
+            "risk_score_explanation": d.get('risk_score_explanation'),
+            "library_id": d.get('library_id'),
+            "repository_url": d.get('repository_url'),
+            "sources": d.get('sources', [])
+        }
+        for d in top
+    ]
+
+    result = {
         "url": repo_url,
         "dependencies": dependencies,
         "analyzed_files": analyzed_files,
         "highest_risk_score": global_top_score,
         "highest_risk_libraries": highest
     }
+    # Only cache complete scans: a failed lookup, an unscored dependency or an
+    # unreadable file may be transient, and the next call should retry it
+    complete = all(d.get('risk_score') is not None for d in dependencies if d.get('name')) and not any(
+        (f.get('report') or {}).get('error') for f in analyzed_files
+    )
+    if commit_sha and complete:
+        await cache_scan_result(repo_url, commit_sha, result)
+    return result
@@ -1,5 +1,5 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, HTTPException, Query, Path, Response
 from ..controllers.repository_scan_controller import (
     create_repository_scan,
     get_repository_scan,
@@ -8,6 +8,7 @@ from ..controllers.repository_scan_controller import (
     update_repository_scan
 )
 from ..models.repository_scan import (
+    SCAN_LIST_ADAPTER,
     RepositoryScanCreate,
     RepositoryScanDocument,
     RepositoryScanUpdate
@@ -18,8 +19,13 @@ router = APIRouter(prefix='/repository-scans', tags=['repository-scans'])
 
 
 @router.get('/', response_model=List[RepositoryScanDocument])
-async def handle_list_repository_scans(limit: int | None = Query(default=None, gt=0)):
-    return await list_repository_scans(limit)
+async def handle_list_repository_scans(
+    limit: int | None = Query(default=None, gt=0),
+    summary: bool = Query(False, description='Return dependency files without their libraries')
+):
+    scans = await list_repository_scans(limit, summary)
+    # Already validated by the controller: serialize once and skip FastAPI's re-validation
+    return Response(SCAN_LIST_ADAPTER.dump_json(scans, by_alias=True), media_type='application/json')
 
 
 @router.get('/search', response_model=List[RepositoryScanDocument])
@@ -27,7 +33,8 @@ async def handle_search_repository_scans(
     q: str = Query(..., min_length=1, description='Search text'),
     limit: int | None = Query(default=None, gt=0)
 ):
-    return await search_repository_scans(q, limit)
+    scans = await search_repository_scans(q, limit)
+    return Response(SCAN_LIST_ADAPTER.dump_json(scans, by_alias=True), media_type='application/json')
 
 
 # Backward compatibility: keep /{scan_id} but hide from docs to avoid /search collision
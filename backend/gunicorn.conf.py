@@ -0,0 +1,14 @@
+"""Production gunicorn settings: `gunicorn -c gunicorn.conf.py app.main:app`."""
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:4000')
+worker_class = 'uvicorn.workers.UvicornWorker'
+# 2n+1 workers by default; each worker builds its own Mongo pool lazily on its loop
+workers = int(os.getenv('WEB_CONCURRENCY', str(2 * multiprocessing.cpu_count() + 1)))
+worker_connections = 1000
+keepalive = 5
+graceful_timeout = 30
+# Imported per worker so no client or event loop is inherited across fork
+preload_app = False
+accesslog = '-'
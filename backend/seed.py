@@ -1,9 +1,8 @@
 import asyncio
-from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.config import get_settings
+from datetime import datetime, timezone
+from app.controllers.library_controller import ensure_indexes
+from app.database import close_client, get_database
 
-settings = get_settings()
 SAMPLE_LIBRARIES = [
   {
     "name": "pydantic",
@@ -16,7 +15,7 @@ SAMPLE_LIBRARIES = [
         "version": "2.7.1",
         "license_name": "MIT",
         "license_url": "https://github.com/pydantic/pydantic/blob/main/LICENSE",
-        "notes": null,
+        "notes": None,
         "license_summary": [
           {
             "summary": "Ticari kullanıma izin verir.",
@@ -44,7 +43,7 @@ SAMPLE_LIBRARIES = [
         "version": "2.8.2",
         "license_name": "MIT",
         "license_url": "https://github.com/pydantic/pydantic/blob/main/LICENSE",
-        "notes": null,
+        "notes": None,
         "license_summary": [
           {
             "summary": "Ticari kullanıma izin verir.",
@@ -86,7 +85,7 @@ SAMPLE_LIBRARIES = [
         "version": "2.2.1",
         "license_name": "MIT",
         "license_url": "https://github.com/pydantic/pydantic-settings/blob/main/LICENSE",
-        "notes": null,
+        "notes": None,
         "license_summary": [
           {
             "summary": "Ticari kullanıma izin verir.",
@@ -121,17 +120,18 @@ SAMPLE_LIBRARIES = [
 
 
 async def main():
-    client = AsyncIOMotorClient(settings.mongodb_uri)
-    db = client[settings.database_name]
+    db = get_database()
     await db.drop_collection('libraries')
+    # Same indexes the API creates at startup, in place before the documents land
+    await ensure_indexes()
+    now = datetime.now(timezone.utc)
     for library in SAMPLE_LIBRARIES:
-        now = datetime.utcnow()
+        library['name_lower'] = library['name'].lower()
         library['created_at'] = now
         library['updated_at'] = now
-        await db['libraries'].insert_one(library)
+    await db['libraries'].insert_many(SAMPLE_LIBRARIES, ordered=False)
     print('Seed complete!')
-    client.close()
-
+    await close_client()
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,40 @@
+import unittest
+
+from app.services.file_analyzer import parse_csproj_file, parse_maven_pom, parse_packages_config
+
+
+# Visual Studio writes this prolog; the content reaches the parser already decoded
+UTF16_PROLOG = '<?xml version="1.0" encoding="utf-16"?>\n'
+
+
+class XmlManifestEncodingTests(unittest.TestCase):
+    def test_csproj_declaring_utf16(self):
+        content = UTF16_PROLOG + (
+            '<Project Sdk="Microsoft.NET.Sdk"><ItemGroup>'
+            '<PackageReference Include="Newtonsoft.Json" Version="13.0.3" />'
+            '<PackageReference Include="Serilog"><Version>3.1.1</Version></PackageReference>'
+            '</ItemGroup></Project>'
+        )
+        self.assertEqual(parse_csproj_file(content), [
+            {"name": "Newtonsoft.Json", "version": "13.0.3"},
+            {"name": "Serilog", "version": "3.1.1"},
+        ])
+
+    def test_packages_config_declaring_utf16(self):
+        content = UTF16_PROLOG + '<packages><package id="NUnit" version="3.14.0" /></packages>'
+        self.assertEqual([dep["name"] for dep in parse_packages_config(content)], ["NUnit"])
+
+    def test_pom_declaring_utf16(self):
+        content = UTF16_PROLOG + (
+            '<project xmlns="http://maven.apache.org/POM/4.0.0"><dependencies>'
+            '<dependency><groupId>org.slf4j</groupId><artifactId>slf4j-api</artifactId><version>2.0.9</version></dependency>'
+            '<dependency><groupId>junit</groupId><artifactId>junit</artifactId><scope>test</scope></dependency>'
+            '</dependencies></project>'
+        )
+        self.assertEqual(parse_maven_pom(content), [
+            {"name": "org.slf4j:slf4j-api", "version": "2.0.9", "groupId": "org.slf4j", "artifactId": "slf4j-api"},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()